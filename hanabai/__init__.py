@@ -0,0 +1 @@
+# Importing the package does no work, see game for the engine and cli for the hanabai command.
@@ -0,0 +1,153 @@
+import sys
+import math
+import random
+import argparse
+import contextlib
+import multiprocessing
+from statistics import NormalDist
+from typing import List, Tuple
+
+from .game import Game, Deck, Result, Tally, Config, game_seed, parse_config
+
+
+def _play(config: Config, seed: int, i: int) -> Tuple[int, bool]:
+    g = Game(sim=Tally(), deck=Deck.normal_deck(random.Random(game_seed(seed, i))), config=config)
+    result = g.run()
+    return g.score, result == Result.STRIKE_OUT
+
+
+# Running sums over paired games, enough to get means and variances of each side and of the per-deck differences.
+class Paired():
+    def __init__(self):
+        self.n = 0
+        self.sum_a = self.sum_b = 0
+        self.sq_a = self.sq_b = 0
+        self.sum_d = self.sq_d = 0
+        self.strikes_a = self.strikes_b = 0
+        self.sum_sd = self.sq_sd = 0
+
+    def add(self, a: Tuple[int, bool], b: Tuple[int, bool]):
+        (score_a, strike_a), (score_b, strike_b) = a, b
+        self.n += 1
+        self.sum_a += score_a
+        self.sq_a += score_a * score_a
+        self.sum_b += score_b
+        self.sq_b += score_b * score_b
+        d = score_b - score_a
+        self.sum_d += d
+        self.sq_d += d * d
+        self.strikes_a += strike_a
+        self.strikes_b += strike_b
+        sd = strike_b - strike_a
+        self.sum_sd += sd
+        self.sq_sd += sd * sd
+
+    def merge(self, other: 'Paired'):
+        for k, v in vars(other).items():
+            setattr(self, k, getattr(self, k) + v)
+
+    @staticmethod
+    def _var(total: int, squares: int, n: int) -> float:
+        return (squares - total * total / n) / (n - 1) if n > 1 else 0.0
+
+    @property
+    def mean_diff(self) -> float:
+        return self.sum_d / self.n
+
+    @property
+    def se_diff(self) -> float:
+        return math.sqrt(self._var(self.sum_d, self.sq_d, self.n) / self.n)
+
+    @property
+    def strikeout_delta(self) -> float:
+        return self.sum_sd / self.n
+
+    @property
+    def se_strikeout_delta(self) -> float:
+        return math.sqrt(self._var(self.sum_sd, self.sq_sd, self.n) / self.n)
+
+    # How many times more games two independent runs would need for the same standard error.
+    @property
+    def pairing_gain(self) -> float:
+        unpaired = self._var(self.sum_a, self.sq_a, self.n) + self._var(self.sum_b, self.sq_b, self.n)
+        paired = self._var(self.sum_d, self.sq_d, self.n)
+        return unpaired / paired if paired else math.inf
+
+
+def _run_batch(job: Tuple[Config, Config, int, int, int]) -> Paired:
+    a, b, seed, start, stop = job
+    paired = Paired()
+    for i in range(start, stop):
+        paired.add(_play(a, seed, i), _play(b, seed, i))
+    return paired
+
+
+class ABResult():
+    def __init__(self, paired: Paired, z: float, verdict: str):
+        self.paired = paired
+        self.z = z
+        self.verdict = verdict
+
+    @property
+    def ci(self) -> Tuple[float, float]:
+        half = self.z * self.paired.se_diff
+        return self.paired.mean_diff - half, self.paired.mean_diff + half
+
+    def __str__(self):
+        p = self.paired
+        lo, hi = self.ci
+        half = self.z * p.se_strikeout_delta
+        return (f'games:{p.n} average_score_a:{p.sum_a / p.n} average_score_b:{p.sum_b / p.n} '
+                f'diff(b-a):{p.mean_diff:+.4f} ci:[{lo:+.4f}, {hi:+.4f}] '
+                f'strikeout_delta:{p.strikeout_delta:+.4f} ci:[{p.strikeout_delta - half:+.4f}, {p.strikeout_delta + half:+.4f}] '
+                f'pairing_gain:{p.pairing_gain:.1f}x verdict:{self.verdict}')
+
+
+# Plays the same seeded decks under configs a and b, a batch at a time, and stops once the score difference is settled:
+# either its confidence interval excludes 0, or it's narrower than +/- margin so any difference is too small to matter.
+# Peeking after every batch would inflate the error rate, so alpha is split evenly over all the looks that could happen (Bonferroni).
+def compare(a: Config, b: Config, max_games: int = 10000, batch: int = 500, min_games: int = 1000,
+            alpha: float = 0.05, margin: float = 0.1, seed: int = 0, workers: int = 1) -> ABResult:
+    looks = math.ceil(max_games / batch)
+    z = NormalDist().inv_cdf(1 - alpha / (2 * looks))
+    jobs = [(a, b, seed, start, min(start + batch, max_games)) for start in range(0, max_games, batch)]
+    paired = Paired()
+    verdict = 'undecided'
+    with multiprocessing.Pool(workers) if workers > 1 else contextlib.nullcontext() as pool:
+        batches = pool.imap(_run_batch, jobs) if pool is not None else map(_run_batch, jobs)
+        for result in batches:
+            paired.merge(result)
+            if paired.n < min_games:
+                continue
+            half = z * paired.se_diff
+            if paired.mean_diff - half > 0:
+                verdict = 'b_better'
+            elif paired.mean_diff + half < 0:
+                verdict = 'a_better'
+            elif half <= margin:
+                verdict = 'equivalent'
+            else:
+                continue
+            break  # leaving the pool's context terminates the batches still running
+    return ABResult(paired, z, verdict)
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Compare two strategy variants on the same seeded decks.')
+    parser.add_argument('--a', nargs='*', default=[], metavar='KEY=VALUE', help='Config overrides for variant a')
+    parser.add_argument('--b', nargs='*', default=[], metavar='KEY=VALUE', help='settings for variant b')
+    parser.add_argument('--max-games', type=int, default=10000)
+    parser.add_argument('--batch', type=int, default=500, help='games between looks at the result')
+    parser.add_argument('--min-games', type=int, default=1000, help='games before stopping early is allowed')
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--margin', type=float, default=0.1, help='score difference small enough to call the variants equivalent')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args(argv)
+    print(compare(parse_config(args.a), parse_config(args.b), args.max_games, args.batch, args.min_games,
+                  args.alpha, args.margin, args.seed, args.workers))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,192 @@
+import sys
+import time
+import random
+import argparse
+import multiprocessing
+from typing import List, Set, Tuple
+
+from .game import Game, Deck, Tally, Card, Action, Play, Discard, Result, game_seed, parse_config
+
+
+# A world that looks the same to the player: their own hand and the deck dealt again from the cards they can't see, with
+# every card still allowed by what the player knows about its slot. None if the deal keeps painting itself into a corner.
+def determinize(game: Game, player_id: int, rng: random.Random, tries: int = 20) -> Game | None:
+    player = game.players[player_id]
+    hidden = game.deck.cards + player.cards
+    # most constrained slots first
+    order = sorted(range(len(player.slots)), key=lambda i: player.slots[i].mask.bit_count())
+    for _ in range(tries):
+        pool = hidden[:]
+        hand: List[Card] = list(player.cards)
+        for i in order:
+            mask = player.slots[i].mask
+            fits = [k for k, c in enumerate(pool) if mask >> c.index & 1]
+            if not fits:
+                break
+            k = rng.choice(fits)
+            hand[i] = pool[k]
+            pool[k] = pool[-1]
+            pool.pop()
+        else:
+            rng.shuffle(pool)
+            world = game.fork()
+            world.redeal(player_id, hand, pool)
+            return world
+    return None
+
+
+# The player whose turn is next, i.e. who game.step() would ask.
+def next_player(game: Game) -> int:
+    return (game.player_turn + 1) % len(game.players)
+
+
+# The moves worth rolling out: what the rules would do first, then every play, every discard when allowed and every
+# clue that passes the good touch checks.
+def candidates(game: Game, player_id: int) -> List[Action]:
+    player = game.players[player_id]
+    actions: List[Action] = [game.fork().players[player_id].prompt()]  # on a fork so instrumentation doesn't count it
+    actions += [Play(i) for i in range(len(player.cards))]
+    if game.can_discard:
+        actions += [Discard(i) for i in range(len(player.cards))]
+    actions += [clue for clue, _ in player.good_touch_clues()]
+    return list(dict.fromkeys(actions))
+
+
+# Per candidate: total score, total squared score and number of rollouts.
+Rollouts = Tuple[List[int], List[int], List[int]]
+
+
+# Rolls candidates out on sampled worlds with the rule players until the deadline, a time.monotonic() value. Every
+# candidate is played on each world before the next is sampled, so they're compared on the same decks. The deadline is
+# checked between rollouts so a search never runs much past it, and each world starts at a different candidate so the
+# one cut short isn't always the same.
+def _search(job: Tuple[Game, int, List[Action], float, int]) -> Rollouts:
+    game, player_id, actions, deadline, seed = job
+    rng = random.Random(seed)
+    totals = [0] * len(actions)
+    squares = [0] * len(actions)
+    counts = [0] * len(actions)
+    start = 0
+    while time.monotonic() < deadline:
+        world = determinize(game, player_id, rng)
+        if world is None:
+            continue
+        for j in range(len(actions)):
+            if time.monotonic() >= deadline:
+                break
+            k = (start + j) % len(actions)
+            world.push()
+            world.step(actions[k])
+            world.run()
+            totals[k] += world.score
+            squares[k] += world.score * world.score
+            counts[k] += 1
+            world.undo()
+        start += 1
+    return totals, squares, counts
+
+
+# The rules' move (actions[0]) stands unless another candidate's average beats it by more than a standard error, so a
+# handful of lucky rollouts doesn't override it.
+class Advice():
+    def __init__(self, actions: List[Action], totals: List[int], squares: List[int], counts: List[int]):
+        self.actions = actions
+        self.totals = totals
+        self.squares = squares
+        self.counts = counts
+        self.action = actions[0]
+        sampled = [k for k in range(len(actions)) if counts[k] > 1]
+        if 0 in sampled:
+            best = max(sampled, key=self.mean)
+            se = (self.variance(best) / counts[best] + self.variance(0) / counts[0]) ** 0.5
+            if self.mean(best) - self.mean(0) > se:
+                self.action = actions[best]
+
+    def mean(self, k: int) -> float:
+        return self.totals[k] / self.counts[k] if self.counts[k] else 0.0
+
+    def variance(self, k: int) -> float:
+        n = self.counts[k]
+        return (self.squares[k] - self.totals[k] ** 2 / n) / (n - 1) if n > 1 else 0.0
+
+    @property
+    def rollouts(self) -> int:
+        return sum(self.counts)
+
+    def __str__(self):
+        rows = '\n'.join(f'  {"*" if a == self.action else " "} {a} average:{self.mean(k):.2f} rollouts:{self.counts[k]}'
+                         for k, a in enumerate(self.actions))
+        return f'advice: {self.action} rollouts:{self.rollouts}\n{rows}'
+
+
+# Suggests a move for whoever's turn is next by Monte Carlo rollouts over worlds consistent with what they know, within
+# budget seconds. The worker processes are started once and reused for every decision; each searches its own worlds.
+class Advisor():
+    def __init__(self, budget: float = 0.05, workers: int = 1, seed: int | None = None):
+        self.budget = budget
+        self.workers = workers
+        self.rng = random.Random(seed)
+        self.pool = multiprocessing.Pool(workers) if workers > 1 else None
+
+    def advise(self, game: Game) -> Advice:
+        deadline = time.monotonic() + self.budget
+        player_id = next_player(game)
+        actions = candidates(game, player_id)
+        if len(actions) == 1:
+            return Advice(actions, [0], [0], [0])
+        base = game.fork()
+        jobs = [(base, player_id, actions, deadline, self.rng.randrange(2**32)) for _ in range(self.workers)]
+        results = self.pool.map(_search, jobs) if self.pool is not None else [_search(jobs[0])]
+        totals, squares, counts = ([sum(r[i][k] for r in results) for k in range(len(actions))] for i in range(3))
+        return Advice(actions, totals, squares, counts)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self) -> 'Advisor':
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+# Plays a game to the end, taking the advisor's move for the players in seats (everyone if None) and the rules' for the rest.
+def play(game: Game, advisor: Advisor, seats: Set[int] | None = None) -> Result:
+    while not game.over:
+        advised = seats is None or next_player(game) in seats
+        if not game.step(advisor.advise(game).action if advised else None):
+            break
+    assert game.result is not None
+    return game.result
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Play seeded games with the Monte Carlo advisor and compare to the rules alone.')
+    parser.add_argument('config', nargs='*', metavar='KEY=VALUE', help='Config overrides')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=0.05, help='seconds per decision')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seats', type=int, nargs='*', help='players that take advice, all by default')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    config = parse_config(args.config)
+    seats = set(args.seats) if args.seats is not None else None
+    rules = advised = 0
+    with Advisor(args.budget, args.workers, args.seed) as advisor:
+        for i in range(args.games):
+            g = Game(sim=Tally(), deck=Deck.normal_deck(random.Random(game_seed(args.seed, i))), config=config)
+            g.run()
+            a = Game(sim=Tally(), deck=Deck.normal_deck(random.Random(game_seed(args.seed, i))), config=config)
+            play(a, advisor, seats)
+            rules += g.score
+            advised += a.score
+            print(f'game:{i} rules:{g.score} advised:{a.score}', flush=True)
+    print(f'games:{args.games} average_score_rules:{rules / args.games} average_score_advised:{advised / args.games}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,383 @@
+import sys
+import time
+import random
+import argparse
+from typing import List, Tuple
+
+import numpy as np
+
+from .game import (Config, Deck, Game, Tally, Result, ScoreStats, COLOR_RANKS, CARD_COLORS, CARD_RANKS, ALL_IDENTITIES,
+                   MAX_SCORE, game_seed, parse_config)
+
+# The same players as game.py, run over a batch of games in lockstep: every game is at the same turn, so the same seat
+# acts in all of them, and each rule is a few array operations over the batch instead of a walk over Python objects.
+# State is struct-of-arrays with the batch first: hands and slot knowledge are (games, players, slots), counts per
+# identity are (games, [players,] identities). Games that finish are dropped from the arrays, so the batch shrinks as
+# it goes. Decisions and results match Game card for card on the same decks, which check() verifies.
+#
+# Knowledge is kept as masks only. What Player.propagate works out incrementally is recomputed as a fixpoint after every
+# move instead: an identity is accounted for when every copy a player can't see is in one of their slots known to be it,
+# and then no other slot of theirs can be it. Both only ever grow, so the fixpoint is the same state the scalar engine
+# reaches one event at a time.
+
+IDENTITIES = len(COLOR_RANKS)
+BITS = np.left_shift(np.int64(1), np.arange(IDENTITIES, dtype=np.int64))
+# Identities of each color (0-4, Color order) and rank (1-5), like game.COLOR_MASKS and RANK_MASKS.
+COLOR_BITS = np.array([sum(1 << (c * 5 + r) for r in range(5)) for c in range(5)], dtype=np.int64)
+RANK_BITS = np.array([0] + [sum(1 << (c * 5 + r - 1) for c in range(5)) for r in range(1, 6)], dtype=np.int64)
+# Color and rank of each identity, game.CARD_COLORS and CARD_RANKS as arrays.
+CARD_COLOR = np.frombuffer(CARD_COLORS, dtype=np.uint8).astype(np.int64)
+CARD_RANK = np.frombuffer(CARD_RANKS, dtype=np.uint8).astype(np.int64)
+# Highest set bit of a slot mask, hands have at most 8 slots.
+TOP = np.array([max(v.bit_length() - 1, 0) for v in range(256)], dtype=np.int64)
+# game.ClueType values.
+NONE, SPLASH, SAVE, PLAY, TRASH = 1, 2, 4, 8, 16
+# Actions, with idx the slot for PLAY_CARD and DISCARD_CARD.
+UNDECIDED, PLAY_CARD, DISCARD_CARD, CLUE = 0, 1, 2, 3
+
+
+def _pack(flags: np.ndarray) -> np.ndarray:
+    return (flags.astype(np.int64) * BITS).sum(-1)
+
+
+def _slot_bits(flags: np.ndarray) -> np.ndarray:
+    return (flags.astype(np.int64) << np.arange(flags.shape[-1])).sum(-1)
+
+
+def _first(flags: np.ndarray) -> np.ndarray:
+    return np.where(flags.any(-1), flags.argmax(-1), -1)
+
+
+class Batch():
+    _rows = ('ids', 'deck', 'left', 'hand', 'mask', 'play', 'clued', 'has_play', 'hand_counts', 'remaining', 'stacks',
+             'tokens', 'strikes', 'score', 'last')
+
+    # decks are card indexes in Deck order, drawn from the end, all the same length.
+    def __init__(self, decks: List[List[int]], config: Config):
+        if config.endgame:
+            raise ValueError('the batch engine has no endgame search')
+        if config.hand_size > 8:
+            raise ValueError('the batch engine keeps slot masks in a byte, hand_size has to be 8 or less')
+        games = len(decks)
+        players, slots = config.player_count, config.hand_size
+        self.config = config
+        self.ids = np.arange(games)
+        self.deck = np.array(decks, dtype=np.int64).reshape(games, -1)
+        self.left = np.full(games, self.deck.shape[1])
+        self.hand = np.full((games, players, slots), -1, dtype=np.int64)
+        self.mask = np.zeros((games, players, slots), dtype=np.int64)
+        self.play = np.zeros((games, players, slots), dtype=bool)
+        self.clued = np.zeros((games, players, slots), dtype=bool)
+        self.has_play = np.zeros((games, players), dtype=bool)
+        self.hand_counts = np.zeros((games, players, IDENTITIES), dtype=np.int64)
+        self.remaining = (self.deck[:, :, None] == np.arange(IDENTITIES)).sum(1)
+        self.stacks = np.zeros((games, 5), dtype=np.int64)
+        self.tokens = np.full(games, config.max_clue_tokens)
+        self.strikes = np.full(games, config.max_strikes)
+        self.score = np.zeros(games, dtype=np.int64)
+        self.last = np.full(games, -1)
+        self.turns = -1
+        self.scores = np.zeros(games, dtype=np.int64)
+        self.results = np.zeros(games, dtype=np.int64)  # Result.value, 0 while playing
+        for p in range(players):
+            for j in range(slots):
+                has = self.left > 0
+                self.left -= has
+                self.hand[:, p, j] = np.where(has, self.deck[np.arange(games), np.maximum(self.left, 0)], -1)
+                self.mask[:, p, j] = np.where(has, ALL_IDENTITIES, 0)
+        self.hand_counts = (self.hand[..., None] == np.arange(IDENTITIES)).sum(2)
+        self._propagate()
+
+    @property
+    def over(self) -> bool:
+        return not len(self.ids)
+
+    def run(self) -> Tuple[np.ndarray, np.ndarray]:
+        while not self.over:
+            self.step()
+        return self.scores, self.results
+
+    # One turn in every game still playing, like Game.step.
+    def step(self):
+        config = self.config
+        self.turns += 1
+        p = self.turns % config.player_count
+        if self.turns == config.max_turns:
+            self._finish(np.ones(len(self.ids), dtype=bool), Result.MAX_TURNS)
+            return
+        self._finish(self.last == p, Result.BOTTOM_OUT)
+        if self.over:
+            return
+        kind, idx, to, color, rank = self._prompt(p)
+        self._apply(p, kind, idx, to, color, rank)
+        self._finish(self.strikes == 0, Result.STRIKE_OUT)
+        self._finish(self.score == MAX_SCORE, Result.VICTORY)
+        self._propagate()
+
+    def _finish(self, done: np.ndarray, result: Result):
+        done &= self.results[self.ids] == 0
+        if not done.any():
+            return
+        self.scores[self.ids[done]] = self.score[done]
+        self.results[self.ids[done]] = result.value
+        keep = ~done
+        for name in self._rows:
+            setattr(self, name, getattr(self, name)[keep])
+
+    # Narrows every slot by what its owner can account for, until nothing changes. Counts per identity are bit-sliced: bit i
+    # of plane k is bit k of identity i's count, so comparing them is a handful of operations on (games, players) masks.
+    def _propagate(self):
+        hand_counts = self.hand_counts
+        unseen = self.remaining[:, None, :] - hand_counts.sum(1)[:, None, :] + hand_counts  # at most 3
+        unseen_low, unseen_high = _pack(unseen & 1 != 0), _pack(unseen & 2 != 0)
+        mask = self.mask
+        while True:
+            single = np.where((mask & (mask - 1)) == 0, mask, 0)
+            planes = [np.zeros_like(unseen_low) for _ in range(4)]  # up to 15 known slots
+            for j in range(mask.shape[2]):
+                carry = single[:, :, j]
+                for k in range(4):
+                    planes[k], carry = planes[k] ^ carry, planes[k] & carry
+            low, high, more = planes[0], planes[1], planes[2] | planes[3]
+            # known >= unseen
+            accounted = more | (high & ~unseen_high) | (~(high ^ unseen_high) & (low | ~unseen_low))
+            narrowed = np.where(single != 0, mask, mask & ~accounted[..., None])
+            if (narrowed == mask).all():
+                break
+            mask = narrowed
+        self.mask = mask
+
+    # Player.prompt for seat p in every game: (kind, idx, to, color, rank) arrays, color -1 and rank 0 when unused.
+    def _prompt(self, p: int) -> Tuple[np.ndarray, ...]:
+        config = self.config
+        games = len(self.ids)
+        players = config.player_count
+        rows = np.arange(games)
+        hand, mask = self.hand, self.mask
+        exists = hand >= 0
+        card = np.maximum(hand, 0)
+        colors = np.where(exists, CARD_COLOR[card], -1)
+        ranks = np.where(exists, CARD_RANK[card], 0)
+        chops = _first(exists & ~self.clued)
+        bits = np.where(exists, np.left_shift(1, card), 0)
+        # identities each player holds in a slot they've narrowed to at most 5, i.e. as good as clued
+        narrowed = np.bitwise_or.reduce(np.where(np.bitwise_count(mask) <= 5, bits, 0), axis=2)
+        stacks = self.stacks
+        open_stacks = stacks < 5
+        one_away = np.where(open_stacks, np.left_shift(1, np.arange(5) * 5 + np.minimum(stacks, 4)), 0).sum(1)
+        played = ((np.left_shift(1, stacks) - 1) << (np.arange(5) * 5)).sum(1)
+        can_clue = self.tokens != 0
+
+        kind = np.zeros(games, dtype=np.int64)
+        idx = np.zeros(games, dtype=np.int64)
+        to = np.zeros(games, dtype=np.int64)
+        color = np.full(games, -1)
+        rank = np.zeros(games, dtype=np.int64)
+
+        # SaveClue, furthest neighbor first, and a neighbor at distance k needs exactly k distinct ranks saved
+        critical = exists & (np.take_along_axis(self.remaining, card.reshape(games, -1), 1).reshape(card.shape) == 1)
+        for k in range(players - 1, 0, -1):
+            n = (p + k) % players
+            start = np.maximum(chops[:, n], 0)
+            alive = np.ones(games, dtype=bool)
+            needed = np.zeros(games, dtype=np.int64)
+            slot = np.full(games, -1)
+            for j in range(config.hand_size):
+                run = alive & (j >= start)
+                hit = run & critical[:, n, j]
+                needed |= np.where(hit, np.left_shift(1, ranks[:, n, j]), 0)
+                slot = np.where(hit & (slot < 0), j, slot)
+                alive &= ~(run & ~critical[:, n, j])
+            save = (kind == UNDECIDED) & can_clue & ~self.has_play[:, n] & (np.bitwise_count(needed) == k) & (slot >= 0)
+            kind[save], to[save] = CLUE, n
+            rank[save] = ranks[rows, n, np.maximum(slot, 0)][save]
+
+        # PlayClue, nearest neighbor first: the lowest playable identity they hold, by color or rank
+        big = config.big_touches
+        for k in range(1, players):
+            n = (p + k) % players
+            playable = exists[:, n] & ((one_away[:, None] >> card[:, n]) & 1).astype(bool)
+            first = np.where(playable, hand[:, n], IDENTITIES).min(1)
+            found = first < IDENTITIES
+            c, r = CARD_COLOR[first % IDENTITIES], CARD_RANK[first % IDENTITIES]  # first is IDENTITIES when not found
+            color_touch = _slot_bits(colors[:, n] == c[:, None])
+            rank_touch = _slot_bits(ranks[:, n] == r[:, None])
+            fewer = np.bitwise_count(color_touch) < np.bitwise_count(rank_touch)
+            rank_first = fewer if big else ~fewer
+            hand_ids = np.bitwise_or.reduce(bits[:, n], axis=1)
+            dup_ids = np.zeros(games, dtype=np.int64)
+            for i in range(config.hand_size):
+                for j in range(i + 1, config.hand_size):
+                    dup_ids |= np.where(exists[:, n, i] & (hand[:, n, i] == hand[:, n, j]), bits[:, n, i], 0)
+            clued = _slot_bits(self.clued[:, n])
+            # narrowed by someone other than the two of them
+            elsewhere = np.bitwise_or.reduce(np.delete(narrowed, [p, n], axis=1), axis=1) if players > 2 else 0
+
+            def good(touch: np.ndarray, ids: np.ndarray) -> np.ndarray:
+                touched = hand_ids & ids
+                right = hand[rows, n, TOP[touch]]
+                return (((touched & (played | dup_ids | elsewhere)) == 0) & ((touch & ~clued) != 0)
+                        & ((one_away >> np.maximum(right, 0)) & 1).astype(bool))
+
+            color_ok = good(color_touch, COLOR_BITS[c])
+            rank_ok = good(rank_touch, RANK_BITS[r])
+            first_ok = np.where(rank_first, rank_ok, color_ok)
+            second_ok = np.where(rank_first, color_ok, rank_ok)
+            clue = (kind == UNDECIDED) & can_clue & found & (first_ok | second_ok)
+            by_rank = np.where(first_ok, rank_first, ~rank_first)
+            kind[clue], to[clue] = CLUE, n
+            rank[clue & by_rank] = r[clue & by_rank]
+            color[clue & ~by_rank] = c[clue & ~by_rank]
+
+        # PlayKnown, rightmost first
+        for j in range(config.hand_size - 1, -1, -1):
+            m = mask[:, p, j]
+            known = exists[:, p, j] & ((m & ~one_away) == 0)
+            hinted = exists[:, p, j] & (np.bitwise_count(m) <= 5) & ((m & one_away) != 0) & self.play[:, p, j]
+            act = (kind == UNDECIDED) & (known | hinted)
+            kind[act], idx[act] = PLAY_CARD, j
+
+        # DiscardChop, else PlayChop
+        chop = np.where(chops[:, p] >= 0, chops[:, p], exists[:, p].sum(1) - 1)
+        rest = kind == UNDECIDED
+        idx[rest] = chop[rest]
+        kind[rest] = np.where(self.tokens != config.max_clue_tokens, DISCARD_CARD, PLAY_CARD)[rest]
+        return kind, idx, to, color, rank
+
+    def _apply(self, p: int, kind: np.ndarray, idx: np.ndarray, to: np.ndarray, color: np.ndarray, rank: np.ndarray):
+        clues = np.flatnonzero(kind == CLUE)
+        if len(clues):
+            self._clue(clues, to[clues], color[clues], rank[clues])
+        moves = np.flatnonzero(kind != CLUE)
+        if len(moves):
+            self._remove(p, moves, idx[moves], kind[moves] == PLAY_CARD)
+
+    # Slot.receive_clue for each slot of the target's hand newest first, then Player.receive_clue's save and play marking.
+    def _clue(self, rows: np.ndarray, to: np.ndarray, color: np.ndarray, rank: np.ndarray):
+        self.tokens[rows] -= 1
+        hand = self.hand[rows, to]
+        mask = self.mask[rows, to]
+        clued = self.clued[rows, to]
+        exists = hand >= 0
+        by_color = color >= 0
+        ids = np.where(by_color, COLOR_BITS[np.maximum(color, 0)], RANK_BITS[rank])
+        card = np.maximum(hand, 0)
+        touched = exists & np.where(by_color[:, None], CARD_COLOR[card] == color[:, None], CARD_RANK[card] == rank[:, None])
+        stacks = self.stacks[rows]
+        open_stacks = stacks < 5
+        one_away = np.where(open_stacks, np.left_shift(1, np.arange(5) * 5 + np.minimum(stacks, 4)), 0).sum(1)
+        min_rank = np.where(open_stacks, stacks + 1, 6).min(1)
+        color_open = open_stacks[np.arange(len(rows)), np.maximum(color, 0)]
+        seen = np.full(len(rows), NONE)
+        types = np.full(hand.shape, NONE)
+        for j in range(hand.shape[1] - 1, -1, -1):  # newest first, the first touched is the focus
+            old_chop = _first(exists & ~clued)
+            mask[:, j] = np.where(exists[:, j], np.where(touched[:, j], mask[:, j] & ids, mask[:, j] & ~ids), mask[:, j])
+            clued[:, j] |= touched[:, j]
+            now = exists[:, j] & touched[:, j]
+            lead = np.where(seen == NONE, PLAY, SPLASH)
+            playable_rank = (one_away & RANK_BITS[rank] & mask[:, j]) != 0
+            by_rank = np.select([rank == min_rank, rank < min_rank, old_chop == j],
+                                [PLAY, TRASH, np.where(playable_rank, NONE, SAVE)], lead)
+            by_col = np.where(color_open, lead, TRASH)
+            types[:, j] = np.where(now, np.where(by_color, by_col, by_rank), NONE)
+            seen |= types[:, j]
+        plays = ((seen & SAVE) == 0) & ((seen & PLAY) != 0)
+        self.mask[rows, to] = mask
+        self.clued[rows, to] = clued
+        self.play[rows, to] |= (types == PLAY) & plays[:, None]
+        self.has_play[rows, to] |= plays
+
+    # Player.pop_card and the draw after it, then Game.play_card or discard_card.
+    def _remove(self, p: int, rows: np.ndarray, idx: np.ndarray, played: np.ndarray):
+        slots = self.config.hand_size
+        card = self.hand[rows, p, idx]
+        src = np.arange(slots - 1) + (np.arange(slots - 1) >= idx[:, None])
+        for name, empty in (('hand', -1), ('mask', 0), ('play', False), ('clued', False)):
+            arr = getattr(self, name)
+            kept = np.take_along_axis(arr[rows, p], src, 1)
+            arr[rows, p] = np.concatenate([kept, np.full((len(rows), 1), empty, dtype=arr.dtype)], 1)
+        size = (self.hand[rows, p] >= 0).sum(1)
+        left = self.left[rows]
+        draws = left > 0
+        drawn = rows[draws]
+        self.left[drawn] -= 1
+        self.hand[drawn, p, size[draws]] = self.deck[drawn, left[draws] - 1]
+        self.mask[drawn, p, size[draws]] = ALL_IDENTITIES
+        empty = rows[~draws]
+        self.last[empty] = np.where(self.last[empty] < 0, p, self.last[empty])
+        self.hand_counts[rows, p, card] -= 1
+        self.hand_counts[drawn, p, self.hand[drawn, p, size[draws]]] += 1
+        self.remaining[rows, card] -= 1
+        c, r = CARD_COLOR[card], CARD_RANK[card]
+        plays, discards = rows[played], rows[~played]
+        c, r = c[played], r[played]
+        fits = self.stacks[plays, c] == r - 1
+        self.stacks[plays[fits], c[fits]] += 1
+        self.score[plays[fits]] += 1
+        self.strikes[plays[~fits]] -= 1
+        self.tokens[discards] += 1
+
+
+def decks(seed: int, start: int, stop: int) -> List[List[int]]:
+    return [[c.index for c in Deck.normal_deck(random.Random(game_seed(seed, i))).cards] for i in range(start, stop)]
+
+
+# Plays games start..stop of a run in batches of size, like game.run_games. Returns (scores, result values) per game.
+def run_games(config: Config, seed: int, start: int, stop: int, size: int = 4096) -> Tuple[np.ndarray, np.ndarray]:
+    scores, results = [], []
+    for first in range(start, stop, size):
+        s, r = Batch(decks(seed, first, min(first + size, stop)), config).run()
+        scores.append(s)
+        results.append(r)
+    return np.concatenate(scores), np.concatenate(results)
+
+
+def stats(scores: np.ndarray, results: np.ndarray) -> ScoreStats:
+    out = ScoreStats()
+    for result in Result:
+        counts = np.bincount(scores[results == result.value], minlength=MAX_SCORE + 1)
+        for score, n in enumerate(counts):
+            if n:
+                out.add(score, result, int(n))
+    return out
+
+
+# Games whose batch score or result differs from Game's on the same deck, as (game, batch, scalar).
+def check(config: Config, seed: int, games: int) -> List[Tuple[int, Tuple[int, str], Tuple[int, str]]]:
+    scores, results = run_games(config, seed, 0, games)
+    wrong = []
+    for i in range(games):
+        g = Game(sim=Tally(), deck=Deck.normal_deck(random.Random(game_seed(seed, i))), config=config)
+        g.run()
+        assert g.result is not None
+        if (g.score, g.result.value) != (scores[i], results[i]):
+            wrong.append((i, (int(scores[i]), Result(results[i]).name), (g.score, g.result.name)))
+    return wrong
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Play seeded games with the batch engine and compare to Game.')
+    parser.add_argument('config', nargs='*', metavar='KEY=VALUE', help='Config overrides')
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--batch', type=int, default=4096, help='games advanced together')
+    parser.add_argument('--check', type=int, default=0, help='also play this many games with Game and compare')
+    args = parser.parse_args(argv)
+    config = parse_config(args.config)
+    start = time.perf_counter()
+    scores, results = run_games(config, args.seed, 0, args.games, args.batch)
+    elapsed = time.perf_counter() - start
+    print(f'batch: games:{args.games} seconds:{elapsed:.2f} games_per_second:{args.games / elapsed:.0f} '
+          f'average_score:{scores.mean():.4f}')
+    print(stats(scores, results))
+    if args.check:
+        start = time.perf_counter()
+        wrong = check(config, args.seed, args.check)
+        elapsed = time.perf_counter() - start
+        print(f'check: games:{args.check} mismatches:{len(wrong)} {wrong[:5]}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
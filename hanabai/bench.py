@@ -0,0 +1,242 @@
+import io
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+from typing import Callable, Dict, List
+
+from dataclasses import asdict
+
+from .game import Game, Deck, Tally, Clue, Config, GameLog, read_log, replay, game_seed, parse_config
+
+# Every benchmark plays the same decks so numbers are comparable between commits.
+BENCH_SEED = 20240101
+# Full-length games, like the rest of the measurements. Config() stops after 2 turns, which only times dealing.
+BENCH_CONFIG = ['max_turns=1000', 'max_clue_tokens=8']
+
+
+def _deck(i: int) -> Deck:
+    return Deck.normal_deck(random.Random(game_seed(BENCH_SEED, i)))
+
+
+def _games(n: int, config: Config) -> List[Game]:
+    return [Game(sim=Tally(), deck=_deck(i), config=config) for i in range(n)]
+
+
+# Best of `repeat` timings of fn, which runs `ops` operations over state built by setup, in ops/sec. Setup isn't timed.
+def _throughput(setup: Callable[[], object], fn: Callable[[object], int], repeat: int) -> float:
+    best = float('inf')
+    ops = 0
+    for _ in range(repeat):
+        state = setup()
+        start = time.perf_counter()
+        ops = fn(state)
+        best = min(best, time.perf_counter() - start)
+    return ops / best
+
+
+# Full game loop, split into phases: dealing (Game construction), the engine (applying actions) and the players' decisions.
+# The engine cost is measured by replaying the recorded actions of the same games, the decision cost is what the full run adds on top.
+def bench_games(n: int, repeat: int, config: Config) -> Dict[str, float]:
+    def deal(_: object) -> int:
+        _games(n, config)
+        return n
+
+    def full(_: object) -> int:
+        for g in _games(n, config):
+            g.run()
+        return n
+
+    def record() -> List[List[list]]:
+        out = io.StringIO()
+        log = GameLog(out)
+        for i in range(n):
+            Game(sim=Tally(), deck=_deck(i), log=log, config=config).run()
+        out.seek(0)
+        return read_log(out)
+
+    def replayed(games: object) -> int:
+        for events in games:  # type: ignore
+            replay(events)
+        return n
+
+    turns = 0
+    for g in _games(n, config):
+        g.run()
+        turns += g.turns
+    deal_rate = _throughput(lambda: None, deal, repeat)
+    full_rate = _throughput(lambda: None, full, repeat)
+    replay_rate = _throughput(record, replayed, repeat)
+    return {
+        'games_per_sec': full_rate,
+        'turns_per_sec': full_rate * turns / n,
+        'deal_ms_per_game': 1000 / deal_rate,
+        'engine_ms_per_game': max(0.0, 1000 / replay_rate - 1000 / deal_rate),
+        'decide_ms_per_game': max(0.0, 1000 / full_rate - 1000 / replay_rate),
+    }
+
+
+def bench_normal_deck(n: int, repeat: int) -> float:
+    def fn(_: object) -> int:
+        for i in range(n):
+            Deck.normal_deck(random.Random(i))
+        return n
+    return _throughput(lambda: None, fn, repeat)
+
+
+def bench_receive_clue(n: int, repeat: int, config: Config) -> float:
+    def fn(games: object) -> int:
+        ops = 0
+        for g in games:  # type: ignore
+            p = g.players[1]
+            card = p.cards[0]
+            for idx, s in enumerate(p.slots):
+                s.receive_clue(idx, rank=card.rank)
+                ops += 1
+        return ops
+    return _throughput(lambda: _games(n, config), fn, repeat)
+
+
+def bench_see_draw(n: int, repeat: int, config: Config) -> float:
+    def fn(games: object) -> int:
+        ops = 0
+        for g in games:  # type: ignore
+            card = g.deck.peek()
+            for p in g.players:
+                p.see_draw(card)
+                ops += 1
+        return ops
+    return _throughput(lambda: _games(n, config), fn, repeat)
+
+
+def bench_is_good_touch(n: int, repeat: int, config: Config) -> float:
+    def fn(games: object) -> int:
+        ops = 0
+        for g in games:  # type: ignore
+            caller, target = g.players[0], g.players[1]
+            for c in target.cards:
+                target.is_good_touch(caller, color=c.color)
+                target.is_good_touch(caller, rank=c.rank)
+                ops += 2
+        return ops
+    return _throughput(lambda: _games(n, config), fn, repeat)
+
+
+def bench_good_touch_clues(n: int, repeat: int, config: Config) -> float:
+    def fn(games: object) -> int:
+        for g in games:  # type: ignore
+            g.players[0].good_touch_clues()
+        return n
+    return _throughput(lambda: _games(n, config), fn, repeat)
+
+
+# Games a few turns in, so the hands have some knowledge to copy.
+def _midgames(n: int, config: Config) -> List[Game]:
+    games = _games(n, config)
+    for g in games:
+        for _ in range(8):
+            if g.over:
+                break
+            g.step()
+    return games
+
+
+def bench_fork(n: int, repeat: int, config: Config) -> float:
+    def fn(games: object) -> int:
+        for g in games:  # type: ignore
+            g.fork()
+        return n
+    return _throughput(lambda: _midgames(n, config), fn, repeat)
+
+
+def bench_push_undo(n: int, repeat: int, config: Config) -> float:
+    def fn(games: object) -> int:
+        for g in games:  # type: ignore
+            g.push()
+            g.undo()
+        return n
+    return _throughput(lambda: _midgames(n, config), fn, repeat)
+
+
+def bench_prompt(n: int, repeat: int, config: Config) -> float:
+    # player 1 decides right after being clued, so the save, play clue and play branches all have work to do
+    def setup() -> List[Game]:
+        games = _games(n, config)
+        for g in games:
+            g.step(Clue(1, rank=g.players[1].cards[-1].rank))
+        return games
+
+    def fn(games: object) -> int:
+        for g in games:  # type: ignore
+            g.players[1].prompt()
+        return n
+    return _throughput(setup, fn, repeat)
+
+
+def run(games: int = 2000, micro: int = 2000, repeat: int = 3, config: Config | None = None) -> Dict[str, object]:
+    config = config if config is not None else parse_config(BENCH_CONFIG)
+    results: Dict[str, float] = bench_games(games, repeat, config)
+    results['normal_deck_per_sec'] = bench_normal_deck(micro, repeat)
+    results['receive_clue_per_sec'] = bench_receive_clue(micro, repeat, config)
+    results['see_draw_per_sec'] = bench_see_draw(micro, repeat, config)
+    results['is_good_touch_per_sec'] = bench_is_good_touch(micro, repeat, config)
+    results['good_touch_clues_per_sec'] = bench_good_touch_clues(micro, repeat, config)
+    results['prompt_per_sec'] = bench_prompt(micro, repeat, config)
+    results['fork_per_sec'] = bench_fork(micro, repeat, config)
+    results['push_undo_per_sec'] = bench_push_undo(micro, repeat, config)
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': BENCH_SEED,
+        'games': games,
+        'config': asdict(config),
+        'results': results,
+    }
+
+
+# Throughput figures (the *_per_sec ones) that dropped by more than threshold against the baseline.
+def regressions(current: Dict[str, object], baseline: Dict[str, object], threshold: float) -> Dict[str, float]:
+    now: Dict[str, float] = current['results']  # type: ignore
+    then: Dict[str, float] = baseline['results']  # type: ignore
+    slower: Dict[str, float] = {}
+    for key, value in then.items():
+        if key.endswith('_per_sec') and key in now and now[key] < value * (1 - threshold):
+            slower[key] = now[key] / value - 1
+    return slower
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the game engine on fixed decks.')
+    parser.add_argument('config', nargs='*', metavar='KEY=VALUE',
+                        help=f'Config overrides on top of {" ".join(BENCH_CONFIG)}')
+    parser.add_argument('--games', type=int, default=2000, help='games for the full-loop benchmark')
+    parser.add_argument('--micro', type=int, default=2000, help='games of state for each micro-benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='timings per benchmark, the best is kept')
+    parser.add_argument('--out', help='write the results as JSON to this file')
+    parser.add_argument('--compare', metavar='BASELINE', help='flag throughput regressions against a stored results file')
+    parser.add_argument('--threshold', type=float, default=0.10, help='allowed throughput drop before it counts as a regression')
+    args = parser.parse_args(argv)
+
+    current = run(args.games, args.micro, args.repeat, parse_config(BENCH_CONFIG + args.config))
+    text = json.dumps(current, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != current['config']:
+            print(f'{args.compare} was measured with a different config, not comparing', file=sys.stderr)
+            return 1
+        slower = regressions(current, baseline, args.threshold)
+        for key, change in slower.items():
+            print(f'REGRESSION {key}: {change:+.1%}', file=sys.stderr)
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
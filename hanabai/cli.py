@@ -0,0 +1,52 @@
+import sys
+import json
+import argparse
+import dataclasses
+from typing import List
+
+from .game import Simulator, parse_config
+
+# Command line entry point, installed as `hanabai`. Importing the engine does no work, so the same modules can be used
+# from tests, benchmarks and the other tools in-process, and worker processes start without replaying anything.
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog='hanabai', description='Simulate seeded games of Hanabi with the rule-based players.')
+    parser.add_argument('config', nargs='*', metavar='KEY=VALUE', help='Config overrides, e.g. big_touches=False')
+    parser.add_argument('-n', '--games', type=int, default=10000, help='games per seed')
+    parser.add_argument('-s', '--seeds', type=int, nargs='+', default=[0], help='one run per seed')
+    parser.add_argument('-p', '--players', type=int, help='players per game, default from the config')
+    parser.add_argument('-w', '--workers', type=int, default=1)
+    parser.add_argument('-f', '--format', choices=('text', 'json'), default='text', help='json prints one object per run')
+    parser.add_argument('--log', help='write every game to this GameLog file, suffixed with the seed')
+    parser.add_argument('--store', help='ResultStore path, stored games are read back instead of played')
+    parser.add_argument('--instrument', action='store_true', help='per-rule counts and timings')
+    parser.add_argument('--checkpoint', help='save progress to this file, suffixed with the seed')
+    parser.add_argument('--checkpoint-every', type=int, default=10000, help='games between checkpoints')
+    parser.add_argument('--resume', action='store_true', help='carry on from the checkpoint if there is one')
+    parser.add_argument('--telemetry', type=float, default=0.0, metavar='SECONDS',
+                        help='print throughput, ETA and running results to stderr this often')
+    parser.add_argument('--telemetry-file', help='also rewrite them to this JSON file, suffixed with the seed')
+    args = parser.parse_args(argv)
+    config = parse_config(args.config)
+    if args.players is not None:
+        config = dataclasses.replace(config, player_count=args.players)
+    store = None
+    if args.store:
+        from .store import ResultStore
+        store = ResultStore(args.store)
+    text = args.format == 'text'
+    for seed in args.seeds:
+        sim = Simulator(args.games, args.workers, seed, f'{args.log}.{seed}' if args.log else None, args.instrument, config,
+                        store, verbose=text, checkpoint=f'{args.checkpoint}.{seed}' if args.checkpoint else None,
+                        checkpoint_every=args.checkpoint_every, resume=args.resume, telemetry=args.telemetry,
+                        telemetry_path=f'{args.telemetry_file}.{seed}' if args.telemetry_file else None)
+        if not text:
+            print(json.dumps(sim.to_dict()), flush=True)
+    if store is not None:
+        store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
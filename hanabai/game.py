@@ -0,0 +1,2011 @@
+import os
+import abc
+import ast
+import sys
+import io
+import json
+import time
+import random
+import functools
+import itertools
+import collections
+import contextlib
+import multiprocessing
+from enum import IntEnum, Enum, auto, Flag
+from typing import List, Dict, Tuple, TextIO, Iterable, Protocol, TYPE_CHECKING
+from dataclasses import dataclass, asdict, replace, fields
+
+if TYPE_CHECKING:
+    from .store import ResultStore
+
+MAX_CLUE_TOKENS = 1
+MAX_STRIKES = 3
+MAX_TURNS = 2
+HAND_SIZE = 4
+PLAYER_COUNT = 4
+
+# class Color(Flag): #this would be cool when things get muddy but too complicated for now
+
+
+class Color(Enum):
+    BLU = auto()
+    RED = auto()
+    GRN = auto()
+    WHI = auto()
+    YEL = auto()
+
+
+class Rank(IntEnum):
+    ZERO = 0
+    ONE = 1
+    TWO = 2
+    THREE = 3
+    FOUR = 4
+    FIVE = 5
+
+
+class Result(Enum):
+    MAX_TURNS = auto()
+    STRIKE_OUT = auto()
+    BOTTOM_OUT = auto()
+    VICTORY = auto()
+    NO_PLAYABLES = auto()
+
+
+class ClueType(Flag):
+    NONE = auto()
+    SPLASH = auto()
+    SAVE = auto()
+    PLAY = auto()
+    TRASH = auto()
+    # ... finesse, gd, bluff etc.
+
+
+ColorRank = Tuple[Color, Rank]
+
+# Every card identity gets a number from 0-24 so that slot knowledge can be a 25-bit mask of what the card could still be.
+COLOR_RANKS: List[ColorRank] = [(c, r) for c in Color for r in Rank if r != Rank.ZERO]
+IDENTITY: Dict[ColorRank, int] = {cr: i for i, cr in enumerate(COLOR_RANKS)}
+# Color (0-4, Color order) and rank (1-5) of each identity, for code that works on identities rather than Cards.
+CARD_COLORS = bytes(c.value - 1 for c, _ in COLOR_RANKS)
+CARD_RANKS = bytes(r for _, r in COLOR_RANKS)
+COPIES = bytes(3 if r == Rank.ONE else 1 if r == Rank.FIVE else 2 for _, r in COLOR_RANKS)
+ALL_IDENTITIES = (1 << len(COLOR_RANKS)) - 1
+# Identities of each color and rank. Lists indexed by Color.value and Rank, since hashing an Enum goes through its name.
+COLOR_MASKS: List[int] = [0] + [sum(1 << i for i, (ic, _) in enumerate(COLOR_RANKS) if ic == c) for c in Color]
+RANK_MASKS: List[int] = [sum(1 << i for i, (_, ir) in enumerate(COLOR_RANKS) if ir == r) for r in Rank]
+
+
+# Actions returned by Player.prompt and carried out by Game.apply.
+@dataclass(frozen=True, slots=True)
+class Play():
+    idx: int
+
+
+@dataclass(frozen=True, slots=True)
+class Discard():
+    idx: int
+
+
+@dataclass(frozen=True, slots=True)
+class Clue():
+    to: int
+    color: Color | None = None
+    rank: Rank | None = None
+
+
+Action = Play | Discard | Clue
+
+
+# Rules of the game and strategy knobs, shared by a Game and its players. The module constants are the defaults.
+@dataclass(frozen=True, slots=True)
+class Config():
+    big_touches: bool = True  # prefer the play clue that touches more cards
+    max_clue_tokens: int = MAX_CLUE_TOKENS
+    max_strikes: int = MAX_STRIKES
+    max_turns: int = MAX_TURNS
+    hand_size: int = HAND_SIZE
+    player_count: int = PLAYER_COUNT
+    endgame: bool = False  # once the deck is empty, pick moves by an open-hands search, see OpenEndgameSearch
+    endgame_nodes: int = 20000  # search budget per move, the rules decide if it runs out
+
+
+# KEY=VALUE overrides of the default Config, e.g. big_touches=False.
+def parse_config(pairs: List[str]) -> Config:
+    names = {f.name for f in fields(Config)}
+    overrides = {}
+    for pair in pairs:
+        key, _, value = pair.partition('=')
+        if key not in names:
+            raise ValueError(f'unknown setting {key}, expected one of {sorted(names)}')
+        overrides[key] = ast.literal_eval(value)
+    return Config(**overrides)
+
+
+class Game():
+    # player_count defaults to the config's, and overrides it when given.
+    def __init__(self, player_count: int | None = None, sim: 'Reporter | None' = None, deck: 'Deck | None' = None, debug: bool = False, log: 'GameLog | None' = None, instrument: 'Instrumentation | None' = None, config: Config | None = None):
+        self.deck = deck if deck is not None else Deck.normal_deck()
+        self.config = config if config is not None else Config()
+        if player_count is None:
+            player_count = self.config.player_count
+        elif player_count != self.config.player_count:
+            self.config = replace(self.config, player_count=player_count)
+        self.log = log
+        self.instrument = instrument
+        if log is not None:
+            log.new_game(player_count, self.deck, self.config)
+        self.board = Board()
+        # Table-wide count of each identity among slots whose owner has narrowed it down to at most 5 possibilities,
+        # i.e. cards that are as good as clued. Each player keeps their own share in Player.narrowed.
+        self.narrowed = bytearray(len(COLOR_RANKS))
+        # Copies of each identity in all the hands together.
+        self.in_hands = bytearray(len(COLOR_RANKS))
+        for c in self.deck._cards[:self.deck.left]:  # type: ignore
+            # for c in Deck.normal_deck()._cards: # type: ignore
+            self.board.remaining[c.index] += 1
+        self.players: List[Player] = [
+            Player(x, self) for x in range(player_count)]
+        self.clue_tokens = self.config.max_clue_tokens
+        self.remaining_strikes = self.config.max_strikes
+        self.score = 0
+        self.player_turn = -1
+        self.last_player: int | None = None
+        self.turns = -1
+        self.sim = sim
+        self.debug = debug
+        self.result: Result | None = None
+        self.undo_stack: List[GameState] = []
+        for p in self.players:
+            if debug:
+                # print(f'{p.id} {p.cards}')
+                pass
+        for p in self.players:
+            for c in p.cards:
+                self.report_draw(p.id, c)
+
+    @property
+    def eventually_playable(self) -> int:
+        return self.board.eventually_playable
+
+    @property
+    def one_away(self) -> set['Card']:
+        return self.board.one_away
+
+    @property
+    def over(self) -> bool:
+        return self.result is not None
+
+    @property
+    def can_discard(self) -> bool:
+        return self.clue_tokens != self.config.max_clue_tokens
+
+    @property
+    def can_clue(self) -> bool:
+        return self.clue_tokens != 0
+
+    def __str__(self):
+        players = '\n'.join([str(p) for p in self.players])
+        one_away = '[' + \
+            ', '.join([str(c) for c in sorted(self.one_away, key=lambda c: c.index)]) + ']'
+        return f'{players}\none_away: {one_away}'
+
+    def __repr__(self):
+        return self.__str__()
+
+    def play_card(self, card: 'Card'):
+        if self.debug:
+            print(f'{self.player_turn} plays {card}', end=' ')
+        self.process_card_removal(card)
+        if self.board.play_card(card):
+            self.score += 1
+            if self.debug:
+                print('+1')
+        else:
+            self.remaining_strikes -= 1
+            if self.log is not None:
+                self.log.strike(self.remaining_strikes)
+            if self.debug:
+                print('strike!')
+        if self.remaining_strikes == 0:  # GAME_OVER
+            if self.debug:
+                print('GAME OVER, 3 STRIKES')
+            self.game_over(Result.STRIKE_OUT)
+            return
+        if self.score == 25:  # GAME_OVER
+            if self.debug:
+                print('YOU WIN')
+            self.game_over(Result.VICTORY)
+            return
+
+    def discard_card(self, card: 'Card'):
+        if self.debug:
+            print(f'{self.player_turn} discards {
+                  card} tokens:{self.clue_tokens}')
+        self.clue_tokens += 1
+        self.process_card_removal(card)
+
+    # Report to players that a copy of a card has been played or discarded.
+    def process_card_removal(self, card: 'Card'):
+        self.board.remove_card(card)
+        for p in self.players:
+            p.learn(card.index)
+
+    # Called whenever a player draws a card. Not called at game_start because all players are drawing cards.
+    def report_draw(self, player_id: int, card: 'Card', game_start: bool = False):
+        if game_start:
+            return
+        for p in self.players:
+            if p.id == player_id:
+                continue
+            p.see_draw(card)
+
+    def give_clue(self, from_: int, to: int, color: Color | None, rank: Rank | None):
+        assert not (color is None and rank is None)
+        assert self.clue_tokens > 0
+        self.clue_tokens -= 1
+        if self.debug:
+            print(
+                f'{from_} clues {to} with {color.name if color else rank} \ttokens:{self.clue_tokens}')
+        for p in self.players:
+            p.receive_clue(from_, to, color, rank)
+
+    # Plays the game to the end, one turn at a time.
+    def run(self) -> Result:
+        while self.step():
+            pass
+        assert self.result is not None
+        return self.result
+
+    # Moves to the next player and carries out their turn, or the given action instead of asking them. Returns False once the game is over.
+    def step(self, action: Action | None = None) -> bool:
+        if self.over:
+            return False
+        if self.debug:
+            print(self)
+            print()
+        self.turns += 1
+        self.player_turn += 1
+        self.player_turn %= len(self.players)
+        if self.turns == self.config.max_turns:
+            self.game_over(Result.MAX_TURNS)
+            return False
+        # if len(self.players[self.player_turn].cards) != 4:
+        #     if self.debug:
+        #         print('GAME OVER, NO MORE CARDS1')
+        #     self.game_over(Result.BOTTOM_OUT)
+        #     return
+        if self.player_turn == self.last_player:
+            if self.debug:
+                print('GAME OVER, NO MORE CARDS')
+            self.game_over(Result.BOTTOM_OUT)
+            return False
+        assert 0 <= self.player_turn < len(self.players)
+        self.apply(action if action is not None else self.players[self.player_turn].prompt())
+        return not self.over
+
+    # Carries out an action for the player whose turn it is.
+    def apply(self, action: Action):
+        player = self.players[self.player_turn]
+        if self.log is not None:
+            self.log.action(player, action)
+        match action:
+            case Play(idx):
+                player.play_card(idx)
+            case Discard(idx):
+                player.discard(idx)
+            case Clue(to, color, rank):
+                player.give_clue(to, color, rank)
+
+    def game_over(self, result: Result):
+        self.result = result
+        if self.log is not None:
+            self.log.game_over(result, self.score, self.turns)
+        if self.sim:
+            self.sim.report(self.score, result)
+        else:
+            print(f'Final Score:{self.score}')
+
+    def get_neighbors(self, id: int) -> List['Player']:
+        return self.players[id+1:] + self.players[:id]
+
+    # Everything that changes during a game, as tuples, bytes and ints. Cards are the shared instances, so nothing in
+    # here needs copying and a snapshot can be restored any number of times.
+    def snapshot(self) -> 'GameState':
+        return (self.deck.left, self.board.snapshot(), self.clue_tokens, self.remaining_strikes, self.score,
+                self.player_turn, self.last_player, self.turns, self.result, bytes(self.narrowed), bytes(self.in_hands),
+                tuple(p.snapshot() for p in self.players))
+
+    def restore(self, state: 'GameState'):
+        (self.deck.left, board, self.clue_tokens, self.remaining_strikes, self.score, self.player_turn, self.last_player,
+         self.turns, self.result, self.narrowed[:], self.in_hands[:], players) = state
+        self.board.restore(board)
+        for p, player in zip(self.players, players):
+            p.restore(player)
+
+    # A copy of the game to try actions on. It shares the deck's cards with this game but nothing that changes, and
+    # is detached from the log, instrumentation and the simulator: the result goes to sim if one is given.
+    def fork(self, sim: 'Reporter | None' = None) -> 'Game':
+        game = Game.__new__(Game)
+        game.deck = self.deck.fork()
+        game.config = self.config
+        game.log = None
+        game.instrument = None
+        game.sim = sim if sim is not None else _DETACHED
+        game.debug = False
+        game.board = self.board.fork()
+        game.narrowed = bytearray(len(COLOR_RANKS))
+        game.in_hands = bytearray(len(COLOR_RANKS))
+        game.players = [Player(p.id, game, deal=False) for p in self.players]
+        game.undo_stack = []
+        game.restore(self.snapshot())
+        return game
+
+    # Deals a player a different hand and the deck a different order, for sampling worlds that look the same to that player.
+    # hand and deck together have to be the cards in the player's hand and the deck now. Other players see the new hand, so
+    # what they had worked out from seeing the old one is redone.
+    def redeal(self, player_id: int, hand: List['Card'], deck: List['Card']):
+        assert len(deck) == self.deck.left
+        self.players[player_id].replace_hand(hand)
+        self.deck = Deck(deck, shuffle=False)
+        for p in self.players:
+            p.recheck_exhausted()
+
+    # Lookahead in place: push(), then step() through the actions to try, then undo() to get back to where push() was
+    # called. Pushes nest. Anything sent to the log or the sim in between stays sent.
+    def push(self):
+        self.undo_stack.append(self.snapshot())
+
+    def undo(self):
+        self.restore(self.undo_stack.pop())
+
+
+# Removes bit idx from a slot mask, moving the bits above it down one, like popping from the hand.
+def _drop_bit(mask: int, idx: int) -> int:
+    low = (1 << idx) - 1
+    return mask & low | mask >> 1 & ~low
+
+
+class Player():
+    # deal=False leaves the hand empty, for restoring a snapshot into.
+    def __init__(self, id: int, game: Game, deal: bool = True):
+        self.id = id
+        self.cards: List[Card] = []
+        self.slots: List[Slot] = []
+        self.game = game
+        self.has_play = False  # probably make that a property
+        # Knowledge propagation worklist: identities whose counts changed and still have to be checked against the hand.
+        self.pending: List[int] = []
+        self.queued = 0
+        # Identities that can't be any card this player doesn't know yet, in the hand or still in the deck.
+        self.exhausted = 0
+        # Index of the hand for clue checks, kept up to date on draws, plays, discards and clues.
+        # Slot masks have bit idx set for self.slots[idx]; identity masks use Card.index.
+        # Indexed like COLOR_MASKS and RANK_MASKS.
+        self.color_slots = [0] * (len(Color) + 1)
+        self.rank_slots = [0] * len(Rank)
+        self.clued_slots = 0
+        self.hand_counts = bytearray(len(COLOR_RANKS))
+        self.hand_ids = 0  # identities in the hand
+        self.dup_ids = 0  # identities with more than one copy in the hand
+        self.narrowed = bytearray(len(COLOR_RANKS))
+        # The prompt rules, in the order they're tried, see Rule.
+        self.rules: List[Rule] = ([OpenEndgameSearch()] if game.config.endgame else []) + RULES
+        for _ in range(game.config.hand_size if deal else 0):
+            self.draw_card(game_start=True)
+
+    def __str__(self):
+        return f'id:{self.id} {self.cards} slots:{self.slots}'
+
+    def __repr__(self):
+        return self.__str__()
+
+    def snapshot(self) -> 'PlayerState':
+        return (tuple(self.cards), tuple(s.snapshot() for s in self.slots), self.has_play, tuple(self.color_slots),
+                tuple(self.rank_slots), self.clued_slots, bytes(self.hand_counts), self.hand_ids, self.dup_ids,
+                bytes(self.narrowed), self.exhausted)
+
+    def restore(self, state: 'PlayerState'):
+        (cards, slots, self.has_play, color_slots, rank_slots, self.clued_slots, self.hand_counts[:], self.hand_ids,
+         self.dup_ids, self.narrowed[:], self.exhausted) = state
+        self.cards = list(cards)
+        self.slots = [Slot.restored(self, slot) for slot in slots]
+        self.color_slots = list(color_slots)
+        self.rank_slots = list(rank_slots)
+        self.pending.clear()
+        self.queued = 0
+
+    @property
+    def chop(self) -> int:  # this ignores chop moves and layered finesse etc.
+        for idx, s in enumerate(self.slots):
+            if s.clued == False:
+                return idx
+        return -1  # magic number... really means that hand is blocked
+
+    def draw_card(self, game_start: bool = False):
+        card = self.game.deck.draw()
+        if card:
+            if self.game.log is not None:
+                self.game.log.draw(self.id, card)
+            bit = 1 << len(self.cards)
+            self.color_slots[card.color.value] |= bit
+            self.rank_slots[card.rank] |= bit
+            self._count_card(card, 1)
+            self.game.report_draw(self.id, card, game_start=game_start)
+            self.cards.append(card)
+            self.slots.append(Slot(self, card))
+            self.propagate()
+        elif self.game.last_player is None:
+            self.game.last_player = self.id
+
+    def play_card(self, idx: int):
+        card = self.pop_card(idx)
+        self.game.play_card(card)
+        pass
+
+    def discard(self, idx: int):
+        assert self.game.clue_tokens != self.game.config.max_clue_tokens
+        card = self.pop_card(idx)
+        self.game.discard_card(card)
+        pass
+
+    def pop_card(self, idx: int) -> 'Card':
+        assert 0 <= idx < len(self.cards)
+        card = self.cards.pop(idx)
+        slot = self.slots.pop(idx)
+        low = (1 << idx) - 1  # inlined _drop_bit
+        self.color_slots = [m & low | m >> 1 & ~low for m in self.color_slots]
+        self.rank_slots = [m & low | m >> 1 & ~low for m in self.rank_slots]
+        self.clued_slots = _drop_bit(self.clued_slots, idx)
+        self._count_card(card, -1)
+        if slot.narrowed:
+            self.count_narrowed(card, -1)
+        self.draw_card()
+        return card
+
+    def _count_card(self, card: 'Card', n: int):
+        i = card.index
+        self.hand_counts[i] += n
+        self.game.in_hands[i] += n
+        bit = 1 << i
+        self.hand_ids = self.hand_ids | bit if self.hand_counts[i] else self.hand_ids & ~bit
+        self.dup_ids = self.dup_ids | bit if self.hand_counts[i] > 1 else self.dup_ids & ~bit
+
+    def count_narrowed(self, card: 'Card', n: int):
+        self.narrowed[card.index] += n
+        self.game.narrowed[card.index] += n
+
+    # Swaps the cards in the hand for others, keeping what the player knows about each slot. Only for determinizing a
+    # fork: the new cards have to come out of the deck and the hand, see Game.redeal.
+    def replace_hand(self, cards: List['Card']):
+        assert len(cards) == len(self.slots)
+        for i, (s, card) in enumerate(zip(self.slots, cards)):
+            old = s.card
+            self._count_card(old, -1)
+            self._count_card(card, 1)
+            if s.narrowed:
+                self.count_narrowed(old, -1)
+                self.count_narrowed(card, 1)
+            bit = 1 << i
+            self.color_slots[old.color.value] &= ~bit
+            self.rank_slots[old.rank] &= ~bit
+            self.color_slots[card.color.value] |= bit
+            self.rank_slots[card.rank] |= bit
+            s.card = card
+        self.cards = list(cards)
+
+    # exhausted is a cache of which identities _accounted is true for, rebuilt after what's visible has changed.
+    def recheck_exhausted(self):
+        self.exhausted = 0
+        for i in range(len(COLOR_RANKS)):
+            if self._accounted(i):
+                self.exhausted |= 1 << i
+
+    # Called when another player receives a draw.
+    def see_draw(self, card: 'Card'):
+        self.learn(card.index)
+
+    # Copies of an identity this player can't see: the ones in their own hand and the ones still in the deck.
+    def unseen(self, identity: int) -> int:
+        return self.game.board.remaining[identity] - self.game.in_hands[identity] + self.hand_counts[identity]
+
+    # Something changed about an identity: a copy was drawn by someone else, played or discarded.
+    def learn(self, identity: int):
+        if self._accounted(identity):
+            self.queue(identity)
+            self.propagate()
+
+    # True if every unseen copy of an identity is in a slot known to be it, and it isn't marked exhausted yet.
+    def _accounted(self, identity: int) -> bool:
+        bit = 1 << identity
+        if self.exhausted & bit:
+            return False
+        unseen = self.unseen(identity)
+        if unseen:
+            for s in self.slots:
+                if s.mask == bit:
+                    unseen -= 1
+        return unseen <= 0
+
+    def queue(self, identity: int):
+        if not self.queued >> identity & 1:
+            self.queued |= 1 << identity
+            self.pending.append(identity)
+
+    # Knowledge propagation. Clues and visible cards narrow slot masks directly; this works out what follows from that:
+    # once every unseen copy of an identity is accounted for by slots known to be it, no other slot can be it. A slot
+    # that's narrowed down to one identity that way queues that identity in turn, until nothing changes.
+    def propagate(self):
+        pending = self.pending
+        while pending:
+            i = pending.pop()
+            bit = 1 << i
+            self.queued &= ~bit
+            if not self._accounted(i):
+                continue
+            self.exhausted |= bit
+            for s in self.slots:
+                if s.mask & bit and s.mask != bit:
+                    s._narrow(s.mask & ~bit)
+
+    # TODO next, I was working on this section. It was sort of unclear if plays and saves were being properly handled. It gets muddy since a 1s clue should result in multiple plays. A color clue should result in one play. And a 2 clue with a 1 one on the stack should only return 1 play.
+    def receive_clue(self, from_: int, to: int, color: Color | None = None, rank: Rank | None = None):
+        # missing: analyze finesse/bluff
+        if from_ == self.id:  # tehcnicaly this will analyze self-bluff self-finesse
+            return
+        if to == self.id:
+            self.clued_slots |= self.touch_mask(color, rank)
+            clue_type = ClueType.NONE
+            clue_types: List[ClueType] = [ClueType.NONE] * len(self.slots)
+            # newest card first, so the play goes on the newest card touched, the one the giver checked in clues_left_to_right
+            for idx in range(len(self.slots) - 1, -1, -1):
+                # print('going in', clue_type)
+                new_clue_type = self.slots[idx].receive_clue(
+                    idx, color, rank, clue_type=clue_type)
+                # print('return', new_clue_type)
+                clue_types[idx] = new_clue_type
+                clue_type |= new_clue_type
+                # print('coming out', new_clue_type)
+                if new_clue_type == ClueType.PLAY:
+                    # print('boink')
+                    pass
+            self.propagate()
+            if clue_type & ClueType.SAVE:
+                # print('gotta save')
+                for i in range(len(clue_types)):
+                    ct = clue_types[i]
+                    if ct != ClueType.NONE and ct != ClueType.SAVE:  # this doesnt do anything
+                        clue_types[i] = ClueType.SPLASH
+                    elif ct == ClueType.SAVE:
+                        self.slots[i].save = True
+            elif clue_type & ClueType.PLAY:
+                # print('gotta play')
+                for idx, ct in enumerate(clue_types):
+                    if ct == ClueType.PLAY:
+                        self.slots[idx].play = True
+                        self.has_play = True
+            else:
+                # TODO if you get a neg clue that reveals the identity of a card in your hand you should have a play.
+                pass
+
+    def give_clue(self, to: int, color: Color | None = None, rank: Rank | None = None):
+        assert not (color is None and rank is None)
+        self.game.give_clue(self.id, to, color, rank)
+
+    # Slots that would be touched by a certain clue, as a bitmask.
+    def touch_mask(self, color: Color | None = None, rank: Rank | None = None) -> int:
+        assert not (color is None and rank is None)
+        return self.color_slots[color.value] if color else self.rank_slots[rank]  # type: ignore
+
+    # Returns the list of cards that woud be touched by a certain clue.
+    def touched_cards(self, color: Color | None = None, rank: Rank | None = None) -> List[Tuple['Card', int]]:
+        touched = self.touch_mask(color, rank)
+        return [(c, i) for i, c in enumerate(self.cards) if touched >> i & 1]
+
+    # Every clue this player could give right now, with the slots it would touch in the target's hand.
+    def legal_clues(self) -> List[Tuple[Clue, int]]:
+        clues: List[Tuple[Clue, int]] = []
+        if not self.game.can_clue:
+            return clues
+        for n in self.neighbors:
+            clues.extend((Clue(n.id, color=c), n.color_slots[c.value]) for c in Color if n.color_slots[c.value])
+            clues.extend((Clue(n.id, rank=r), n.rank_slots[r]) for r in Rank if n.rank_slots[r])
+        return clues
+
+    # The legal clues that pass the good touch checks.
+    def good_touch_clues(self) -> List[Tuple[Clue, int]]:
+        players = self.game.players
+        return [(clue, m) for clue, m in self.legal_clues() if players[clue.to].is_good_touch(self, clue.color, clue.rank)]
+
+    # Returns True if a touch is good i.e. it touches cards that are only eventually playable, cards that are not already clued, identical cards, cards that you may have and already clued.
+    # This should not be called when evaluating saves.
+    # Exceptions:
+    #    left-to-right play meaning the rest will be trash i.e marking 5y (play) 1y 2y (trash)
+    #    marking kt, (like with trash bluff)
+    #    stuff that can be handled with sarcastic discard.
+    # TODO this shouldn't only look at possibilites since that is mathematic, this should really look at probables i.e. marking a 3 when you were given a 3-save is probably ok.
+    # important! caller is the player giving the clue, the checks are all mask operations on this hand's index.
+    def is_good_touch(self, caller: 'Player', color: Color | None = None, rank: Rank | None = None) -> bool:
+        return self.bad_touch_reason(caller, color, rank) is None
+
+    # Same as is_good_touch, but names the check that rejected the touch.
+    def bad_touch_reason(self, caller: 'Player', color: Color | None = None, rank: Rank | None = None) -> str | None:
+        # a clue touches every copy in the hand of the identities it matches
+        touched_ids = self.hand_ids & (COLOR_MASKS[color.value] if color else RANK_MASKS[rank])  # type: ignore
+        # Check to make sure cards are eventually playable, almost certainly not a good touch
+        if touched_ids & ~self.game.eventually_playable:
+            return 'not_eventually_playable'
+
+        # Touch contains duplicate cards, almost certainly not a good touch
+        if touched_ids & self.dup_ids:
+            return 'duplicate'
+
+        # Count of newly touched cards, if it's 0 almost certainly a bad touch. This forbids tempo clues
+        if not self.touch_mask(color, rank) & ~self.clued_slots:
+            return 'no_new_touches'
+
+        # It's not a good touch if a neighbor has already had this card clued
+        narrowed = self.game.narrowed
+        while touched_ids:
+            i = touched_ids.bit_length() - 1
+            if narrowed[i] > caller.narrowed[i] + self.narrowed[i]:
+                return 'clued_elsewhere'
+            touched_ids &= ~(1 << i)
+
+        # TODO It can be a good touch, but it's probably not, check to see if you haven't been marked with the card you're trying to touch.
+        # The dict version of this check compared possibilities against (card, idx) pairs so it never fired; turning it on is a strategy change.
+        return None
+
+    def clues_left_to_right(self, touched: int) -> bool:
+        return self.cards[touched.bit_length() - 1] in self.game.one_away
+
+    @property
+    def neighbors(self):
+        return self.game.get_neighbors(self.id)
+
+    @property
+    def card_types(self) -> set['Card']:
+        return set(self.cards)
+
+    # Decide on a play, discard or clue. The rules are tried in order and the first one that comes up with an action wins.
+    def prompt(self) -> Action:
+        instrument = self.game.instrument
+        if instrument is not None:
+            return instrument.prompt(self)
+        return self.decide()
+
+    def decide(self) -> Action:
+        features = Features(self)
+        for rule in self.rules:
+            action = rule(self, features)
+            if action is not None:
+                return action
+        raise AssertionError('play_chop always acts')
+
+
+# What the rules read on one turn, from the point of view of the player deciding. Each figure is worked out the first
+# time a rule asks for it and kept for the rest of the turn, so a rule that fires early doesn't pay for the ones after it
+# and a new rule gets the figures the others already use for free.
+class Features():
+    def __init__(self, player: Player):
+        game = player.game
+        self.player = player
+        self.game = game
+        self.can_clue = game.can_clue
+        self.can_discard = game.can_discard
+        self.one_away = game.board.one_away_mask
+        self.remaining = game.board.remaining
+
+    @functools.cached_property
+    def neighbors(self) -> List[Player]:
+        return self.player.neighbors
+
+    # Chop of each neighbor by id, -1 when all their cards are clued.
+    @functools.cached_property
+    def chops(self) -> Dict[int, int]:
+        return {n.id: n.chop for n in self.neighbors}
+
+    # The slot this player discards or plays blind: chop, or the newest card when every card is clued.
+    @functools.cached_property
+    def chop(self) -> int:
+        chop = self.player.chop
+        return chop if chop != -1 else len(self.player.cards) - 1
+
+    # Per neighbor id, the last copies from their chop on that would have to be saved: (distinct ranks, first slot or None).
+    # It stops at the first card that isn't critical and ignores double discards. Nothing is needed from a neighbor that
+    # already has a play.
+    @functools.cached_property
+    def saves(self) -> Dict[int, Tuple[int, int | None]]:
+        remaining = self.remaining
+        saves: Dict[int, Tuple[int, int | None]] = {}
+        for n in self.neighbors:
+            ranks: set[int] = set()
+            slot: int | None = None
+            if not n.has_play:
+                chop = self.chops[n.id]
+                for idx, c in enumerate(n.cards):
+                    if idx < chop:
+                        continue
+                    if remaining[c.index] != 1:
+                        break
+                    ranks.add(c.rank)
+                    slot = idx if slot is None else slot
+            saves[n.id] = (len(ranks), slot)
+        return saves
+
+    # Per neighbor id, the play clues worth checking: (slots touched, color, rank) for the color and the rank of the lowest
+    # playable identity they hold, in the order config.big_touches prefers. Empty when nothing of theirs is playable.
+    @functools.cached_property
+    def play_clues(self) -> Dict[int, List[Tuple[int, Color | None, Rank | None]]]:
+        one_away = self.one_away
+        big_touches = self.game.config.big_touches
+        candidates: Dict[int, List[Tuple[int, Color | None, Rank | None]]] = {}
+        for n in self.neighbors:
+            # lowest index rather than set order, so the pick doesn't depend on the per-process string hash seed
+            playable = [c for c in n.cards if one_away >> c.index & 1]
+            if not playable:
+                candidates[n.id] = []
+                continue
+            card = min(playable, key=lambda c: c.index)
+            # TODO we're only looking at the first one_away
+            # TODO this doesnt yet observe left-to-right principle
+            color_touches = n.color_slots[card.color.value]
+            rank_touches = n.rank_slots[card.rank]
+            clues: List[Tuple[int, Color | None, Rank | None]] = [(color_touches, card.color, None), (rank_touches, None, card.rank)]
+            # prefer color if even, otherwise probably go for most play clues and then most touches.
+            if (big_touches and color_touches.bit_count() < rank_touches.bit_count()) or (not big_touches and color_touches.bit_count() >= rank_touches.bit_count()):
+                clues = clues[::-1]
+            candidates[n.id] = clues
+        return candidates
+
+    # The rightmost slot this player knows to be playable, or hinted as a play and possibly playable; -1 if there's none.
+    @functools.cached_property
+    def playable_known(self) -> int:
+        one_away = self.one_away
+        slots = self.player.slots
+        for idx in range(len(slots) - 1, -1, -1):
+            s = slots[idx]
+            if not s.mask & ~one_away:  # every possibility is playable
+                return idx
+            if s.mask.bit_count() <= 5 and s.mask & one_away and s.play:
+                return idx
+        return -1
+
+
+# One step of Player.decide: an action, or None to leave it to the rules after it. Rules only read the player and the
+# turn's Features, so one instance can be shared by every player, and conventions are added by putting a Rule in
+# Player.rules where it belongs in the order.
+class Rule(abc.ABC):
+    name = ''
+
+    @abc.abstractmethod
+    def __call__(self, player: Player, features: Features) -> Action | None:
+        ...
+
+
+class SaveClue(Rule):
+    name = 'save'
+
+    # missing: check if should clue (i.e. dont waste tokens, dont clue 1s on your neighbor if that means they won't be able to clue 1s on their neighbor's 1 chop which is unrelated to your own clue)
+    # 1. respond to possible bluff
+    # missing: <stubbed>
+    # 2. Look for save, starting backwards because sometimes double or even triple saves are necessary
+    # missing: check if n-1 can clue play to neighbor... if n-1 is you, forced clue
+    # kind of complicated because ideally there are no bad touches, but sometimes it is more efficient to make a bad touch play-clue than a double/triple-save
+    def __call__(self, player: Player, features: Features) -> Action | None:
+        if not features.can_clue:
+            return None
+        neighbors = features.neighbors
+        saves = features.saves
+        for dist in range(len(neighbors), 0, -1):
+            n = neighbors[dist - 1]
+            saves_needed, save_slot = saves[n.id]
+            if saves_needed == dist and save_slot is not None:
+                # give number save clue to first save_slot
+                return Clue(n.id, rank=n.cards[save_slot].rank)
+        return None
+
+
+# look for play clue
+class PlayClue(Rule):
+    name = 'play_clue'
+
+    def __call__(self, player: Player, features: Features) -> Action | None:
+        if not features.can_clue:
+            return None
+        instrument = features.game.instrument
+        play_clues = features.play_clues
+        for n in features.neighbors:
+            for touches, clue_color, clue_rank in play_clues[n.id]:
+                reason = n.bad_touch_reason(player, clue_color, clue_rank) or (
+                    None if n.clues_left_to_right(touches) else 'not_left_to_right')
+                if instrument is not None:
+                    instrument.candidate(reason)
+                if reason is None:
+                    return Clue(n.id, color=clue_color, rank=clue_rank)
+        return None
+
+
+class PlayKnown(Rule):
+    name = 'play_known'
+
+    def __call__(self, player: Player, features: Features) -> Action | None:
+        idx = features.playable_known
+        return Play(idx) if idx != -1 else None
+
+
+class DiscardChop(Rule):
+    name = 'discard_chop'
+
+    def __call__(self, player: Player, features: Features) -> Action | None:
+        return Discard(features.chop) if features.can_discard else None
+
+
+class PlayChop(Rule):
+    name = 'play_chop'
+
+    def __call__(self, player: Player, features: Features) -> Action | None:
+        return Play(features.chop)
+
+
+# Once the deck is empty the only thing this player doesn't know is the order of their own hand: the cards are whatever
+# they can't see. Every move is scored by averaging, over the orders their slot knowledge allows, the best score the
+# table could still reach from there with every card known, see OpenEndgame. That's a perfect-information heuristic, not
+# a search of what the table will actually do: it assumes teammates see their own cards and make the best move, while
+# they follow their rules, so the line it picks can count on moves nobody will make. Clues carry no information in it,
+# only the token.
+class OpenEndgameSearch(Rule):
+    name = 'open_endgame'
+
+    def __call__(self, player: Player, features: Features) -> Action | None:
+        game = features.game
+        if game.deck.left:
+            return None
+        hand = [i for i in range(len(COLOR_RANKS)) for _ in range(player.unseen(i))]
+        orders = {order for order in itertools.permutations(hand)
+                  if all(s.mask >> i & 1 for s, i in zip(player.slots, order))}
+        clues = player.legal_clues()
+        moves: List[Action] = [clues[0][0]] if clues else []
+        if features.can_discard:
+            moves += [Discard(i) for i in range(len(player.cards))]
+        moves += [Play(i) for i in range(len(player.cards))]
+        if not orders:
+            return None
+        if len(moves) == 1:
+            return moves[0]
+        search = OpenEndgame(game, player.id)
+        try:
+            totals = [sum(search.after(move, order) for order in orders) for move in moves]
+        except _OutOfBudget:
+            return None
+        return moves[totals.index(max(totals))]
+
+
+# The rules in the order Player.decide tries them, see Player.rules. Config.endgame puts OpenEndgameSearch in front.
+RULES: List[Rule] = [SaveClue(), PlayClue(), PlayKnown(), DiscardChop(), PlayChop()]
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
+# Best score the table can still reach with every card known to everyone and every move chosen to score: an upper bound
+# on what players who can't see their own cards will get, not a prediction of it. States are (stacks, hands, seat, turns,
+# final, tokens, strikes) with stacks packed 3 bits per color, hands as sorted tuples of Card.index and seats counted from
+# the player who started the search, so hand order and who's who don't split the table. Values are the points still to
+# come.
+#
+# turns is what max_turns leaves. final is the turns left in the final round, or None until it starts: the first player
+# to play or discard once the deck is empty sets Game.last_player, and everyone else gets one more turn after that
+# one. Clues given before then don't count against it.
+class OpenEndgame():
+    def __init__(self, game: Game, player_id: int):
+        self.players = len(game.players)
+        self.player_id = player_id
+        self.max_tokens = game.config.max_clue_tokens
+        self.budget = game.config.endgame_nodes
+        self.nodes = 0
+        self.table: Dict[Tuple[object, ...], int] = {}
+        self.stacks = sum(int(s.rank) << 3 * c for c, s in enumerate(game.board.stacks.values()))
+        self.hands = tuple(tuple(sorted(c.index for c in game.players[(player_id + k) % self.players].cards))
+                           for k in range(self.players))
+        self.turns = game.config.max_turns - game.turns
+        # the game ends when it's last_player's turn again
+        self.final = (game.last_player - player_id) % self.players if game.last_player is not None else None
+        self.tokens = game.clue_tokens
+        self.strikes = game.remaining_strikes
+
+    # final after a move, with moved whether it played or discarded.
+    def _final(self, final: int | None, moved: bool) -> int | None:
+        if final is not None:
+            return final - 1
+        return self.players - 1 if moved else None
+
+    # Points the searching player's move scores, plus the best the table can do after it, if their hand is in that order.
+    def after(self, move: Action, order: Tuple[int, ...]) -> int:
+        hands = (tuple(sorted(order)),) + self.hands[1:]
+        turns, final, tokens, strikes = self.turns, self.final, self.tokens, self.strikes
+        match move:
+            case Clue():
+                return self.best(self.stacks, hands, 1, turns - 1, self._final(final, False), tokens - 1, strikes)
+            case Discard(idx):
+                return self.best(self.stacks, _without(hands, 0, order[idx]), 1, turns - 1, self._final(final, True),
+                                 tokens + 1, strikes)
+            case Play(idx):
+                return self._play(self.stacks, hands, 0, order[idx], turns, final, tokens, strikes)
+        return 0
+
+    def _play(self, stacks: int, hands: Tuple[Tuple[int, ...], ...], seat: int, card: int, turns: int, final: int | None,
+              tokens: int, strikes: int) -> int:
+        color = CARD_COLORS[card]
+        rest = _without(hands, seat, card)
+        after = (seat + 1) % self.players
+        final = self._final(final, True)
+        if stacks >> 3 * color & 7 == CARD_RANKS[card] - 1:
+            return 1 + self.best(stacks + (1 << 3 * color), rest, after, turns - 1, final, tokens, strikes)
+        if strikes == 1:
+            return 0
+        return self.best(stacks, rest, after, turns - 1, final, tokens, strikes - 1)
+
+    # Most points the table can still score, with seat to move.
+    def best(self, stacks: int, hands: Tuple[Tuple[int, ...], ...], seat: int, turns: int, final: int | None, tokens: int,
+             strikes: int) -> int:
+        if turns <= 0 or final == 0:
+            return 0
+        key = (stacks, hands, seat, turns, final, tokens, strikes)
+        value = self.table.get(key)
+        if value is not None:
+            return value
+        # before the final round starts only its turns can score, clues before it don't
+        bound = min(turns, final if final is not None else self.players, _reachable(stacks, hands))
+        if not bound:
+            self.table[key] = 0
+            return 0
+        self.nodes += 1
+        if self.nodes > self.budget:
+            raise _OutOfBudget()
+        hand = hands[seat]
+        after = (seat + 1) % self.players
+        value = 0
+        for card in set(hand):
+            if stacks >> 3 * CARD_COLORS[card] & 7 == CARD_RANKS[card] - 1:
+                value = max(value, self._play(stacks, hands, seat, card, turns, final, tokens, strikes))
+                if value == bound:
+                    break
+        if value < bound:
+            passed = False
+            if tokens and any(h for k, h in enumerate(hands) if k != seat):
+                passed = True
+                value = max(value, self.best(stacks, hands, after, turns - 1, self._final(final, False), tokens - 1, strikes))
+            if tokens < self.max_tokens:
+                for card in set(hand):
+                    passed = True
+                    value = max(value, self.best(stacks, _without(hands, seat, card), after, turns - 1,
+                                                 self._final(final, True), tokens + 1, strikes))
+            if not passed:  # nothing left but to play a card that doesn't fit
+                for card in set(hand):
+                    value = max(value, self._play(stacks, hands, seat, card, turns, final, tokens, strikes))
+        self.table[key] = value
+        return value
+
+
+def _without(hands: Tuple[Tuple[int, ...], ...], seat: int, card: int) -> Tuple[Tuple[int, ...], ...]:
+    hand = list(hands[seat])
+    hand.remove(card)
+    return hands[:seat] + (tuple(hand),) + hands[seat + 1:]
+
+
+# Points the cards in the hands could still add, ignoring turns: per color, the run of ranks above the stack that's held.
+def _reachable(stacks: int, hands: Tuple[Tuple[int, ...], ...]) -> int:
+    held = 0
+    for hand in hands:
+        for card in hand:
+            held |= 1 << card
+    points = 0
+    for color in range(5):
+        rank = stacks >> 3 * color & 7
+        run = held >> (color * 5 + rank) & 31 >> rank  # the ranks above the stack
+        points += (~run & (run + 1)).bit_length() - 1  # trailing ones
+    return points
+
+
+class Slot():
+    __slots__ = ('player', 'card', 'mask', 'probable', 'save', 'play', 'clued', 'trash', 'narrowed')
+
+    def __init__(self, player: Player, card: 'Card'):
+        self.player = player
+        self.card = card
+        # One bit per identity this card could still be. Anything the owner has already ruled out for every unknown card,
+        # i.e. all unseen copies are accounted for, is ruled out from the start.
+        self.mask = ALL_IDENTITIES
+        self.probable: set[Tuple[Color, Rank]] = set()
+        self.save = False
+        self.play = False
+        self.clued = False
+        self.trash = False
+        self.narrowed = False  # at most 5 possibilities left, counted in Player.narrowed
+        self._narrow(ALL_IDENTITIES & ~player.exhausted)
+
+    # probable is replaced rather than changed, so snapshots can share it.
+    def snapshot(self) -> 'SlotState':
+        return (self.card, self.mask, self.probable, self.save, self.play, self.clued, self.trash, self.narrowed)
+
+    # A slot as it was at snapshot(), skipping __init__, which would count it as a new card.
+    @staticmethod
+    def restored(player: Player, state: 'SlotState') -> 'Slot':
+        slot = Slot.__new__(Slot)
+        slot.player = player
+        slot.card, slot.mask, slot.probable, slot.save, slot.play, slot.clued, slot.trash, slot.narrowed = state
+        return slot
+
+    def __str__(self):
+        # possibly = 'unk' if len(self.possibilites) < 10 else ''
+        if self.mask.bit_count() > 10:
+            possibly = 'unk'
+        else:
+            possibly = '[' + ', '.join([f'{c.name}-{r}:{n}' for (c, r),
+                                       n in self.possibilites.items()]) + ']'
+        return f'<{self.card} {possibly}>'
+
+    def __repr__(self):
+        return self.__str__()
+
+    @property
+    def game(self) -> Game:
+        return self.player.game
+
+    # Identities this card could still be, with the number of copies its owner hasn't seen.
+    @property
+    def possibilites(self) -> dict[Tuple[Color, Rank], int]:
+        return {cr: self.copies_left(i) for i, cr in enumerate(COLOR_RANKS) if self.mask >> i & 1}
+
+    def copies_left(self, identity: int) -> int:
+        return self.player.unseen(identity)
+
+    def could_be(self, identity: int) -> bool:
+        return bool(self.mask >> identity & 1)
+
+    def receive_clue(self, idx: int, color: Color | None = None, rank: Rank | None = None, clue_type: ClueType | None = None) -> ClueType:
+        assert not (color is None and rank is None)
+        old_chop = self.player.chop
+        clued = self._remove_possibilities(color, rank)
+        if clued and rank:
+            min_rank = self.game.board.min_playable_rank
+            # if rank == Rank.FIVE:
+            #     print('heyo', min_rank, self.game.one_away,
+            #           [(c,r) for c, r in self.game.one_away if r < rank and (c, r) in self.possibilites])
+            #     print(idx, self.player.chop)
+
+            # i.e. 1 can never be a save, 2 is not a save if all 1s are down
+            if rank == min_rank:
+                return ClueType.PLAY
+            # i.e. 1 is trash if all 1s are played.
+            elif rank < min_rank:
+                self.trash = True
+                return ClueType.TRASH
+            # i.e. 5 is save if any stack is at less than 4. But if i.e stacks are 4,4,4,1 and the 1 stack has the 5 in the discard pile. all 5s are now playable.
+            elif idx == old_chop and rank > min_rank:
+                currently_playable = [c for c in self.game.one_away if c.rank == rank and self.could_be(c.index)]
+                # print('ncr', currently_playable)
+                if not len(currently_playable):
+                    return ClueType.SAVE
+            else:  # It's a play clue if it's the newest touched. Will adjust later if a save comes up
+                return ClueType.PLAY if clue_type == ClueType.NONE else ClueType.SPLASH
+        elif clued and color:
+            if color not in self.game.board.playable_colors:  # trash if the color is not playable
+                return ClueType.TRASH
+            # It's a play clue if it's the newest touched. Cannot be a save.
+            else:
+                return ClueType.PLAY if clue_type == ClueType.NONE else ClueType.SPLASH
+        return ClueType.NONE
+
+    # Applies the clue to the mask, touched or not: a card that isn't touched by a red clue isn't red. Returns true if this
+    # clue touched it, a card clued before and not touched now isn't what this clue is about.
+    def _remove_possibilities(self, color: Color | None, rank: Rank | None) -> bool:
+        assert not (color is None and rank is None)
+        if color:
+            touched = self.card.color == color
+            clue_mask = COLOR_MASKS[color.value]
+        else:
+            touched = self.card.rank == rank
+            clue_mask = RANK_MASKS[rank]  # type: ignore
+        self._narrow(self.mask & clue_mask if touched else self.mask & ~clue_mask)
+        if touched:
+            self.clued = True
+        return touched
+
+    # Every change to the mask goes through here so the table-wide narrowed counts stay current and a card that's down to
+    # one identity gets propagated by the owner. Masks only ever shrink.
+    def _narrow(self, mask: int):
+        if mask == self.mask:
+            return
+        self.mask = mask
+        count = mask.bit_count()
+        if not self.narrowed and count <= 5:
+            self.narrowed = True
+            self.player.count_narrowed(self.card, 1)
+        if count == 1:
+            self.probable = set((COLOR_RANKS[mask.bit_length() - 1],))
+            self.player.queue(mask.bit_length() - 1)
+
+
+# Besides the stacks, the board keeps the views that players read many times per turn. They only change when a card is played, so they're updated in place there instead of being rebuilt from the stacks.
+class Board():
+    def __init__(self):
+        self.stacks: Dict[Color, Stack] = Board._normal_board()
+        # Copies of each identity that haven't been played or discarded, indexed by Card.index.
+        self.remaining = bytearray(len(COLOR_RANKS))
+        self.eventually_playable = ALL_IDENTITIES
+        self.one_away: set[Card] = set()
+        for stack in self.stacks.values():
+            self.one_away |= stack.one_away
+        self.one_away_mask = sum(1 << c.index for c in self.one_away)
+        self.playable_colors: set[Color] = set(self.stacks)
+        self.min_playable_rank = Rank.ONE
+
+    # Returns True if the card was played onto its stack.
+    def play_card(self, card: 'Card') -> bool:
+        stack = self.stacks[card.color]
+        if not stack.play_card(card):
+            return False
+        self.eventually_playable &= ~(1 << card.index)
+        self.one_away.remove(card)
+        self.one_away_mask &= ~(1 << card.index)
+        if stack.rank == Rank.FIVE:
+            self.playable_colors.remove(card.color)
+        else:
+            nxt = CARDS[card.index + 1]
+            self.one_away.add(nxt)
+            self.one_away_mask |= 1 << nxt.index
+        # max rank + 1 once every stack is complete
+        self.min_playable_rank = min((c.rank for c in self.one_away), default=Rank.FIVE + 1)
+        return True
+
+    # The sets are kept as frozensets, copying those back into sets doesn't hash anything again.
+    def snapshot(self) -> 'BoardState':
+        return (tuple(s.rank for s in self.stacks.values()), bytes(self.remaining), self.eventually_playable,
+                frozenset(self.one_away), self.one_away_mask, frozenset(self.playable_colors), self.min_playable_rank)
+
+    def restore(self, state: 'BoardState'):
+        (ranks, self.remaining[:], self.eventually_playable, one_away, self.one_away_mask, playable_colors,
+         self.min_playable_rank) = state
+        for stack, rank in zip(self.stacks.values(), ranks):
+            stack.rank = rank
+        self.one_away = set(one_away)
+        self.playable_colors = set(playable_colors)
+
+    def fork(self) -> 'Board':
+        board = Board.__new__(Board)
+        board.stacks = {c: Stack(c, stack.rank) for c, stack in self.stacks.items()}
+        board.remaining = bytearray(self.remaining)
+        board.restore(self.snapshot())
+        return board
+
+    # Returns True if that was the last copy of the card.
+    def remove_card(self, card: 'Card') -> bool:
+        self.remaining[card.index] -= 1
+        return self.remaining[card.index] == 0
+
+    @staticmethod
+    def _normal_board() -> Dict[Color, 'Stack']:
+        stacks: Dict[Color, 'Stack'] = {}
+        for c in Color:
+            stacks[c] = Stack(c)
+        return stacks
+
+
+class Stack():
+    def __init__(self, color: Color, rank: Rank = Rank.ZERO):
+        self.color: Color = color
+        self.rank: Rank = rank
+
+    def play_card(self, card: 'Card') -> bool:
+        if card.rank != self.rank + 1:
+            return False
+        if card.color == self.color:
+            self.rank = Rank(self.rank + 1)
+            return True
+        return False
+
+    # @property
+    # def eventually_playable(self) -> set[Tuple[Color, Rank]]:
+    #     s: set[Tuple[Color, Rank]] = set()
+    #     for r in Rank:
+    #         if r > self.rank:
+    #             s.add((self.color, r))
+    #     return s
+
+    @property
+    def one_away(self) -> set['Card']:
+        s: set[Card] = set()
+        if self.rank != 5:
+            s.add(card_from_color_rank((self.color, Rank(self.rank + 1))))
+        return s
+
+
+# Cards are drawn from the end. The list itself is never changed after shuffling, drawing only moves `left` down, so
+# snapshots and forks of a game can share it.
+class Deck():
+    def __init__(self, cards: List['Card'], rng: random.Random | None = None, shuffle: bool = True):
+        self._cards = cards
+        self.size = len(self._cards)
+        if shuffle:
+            (rng if rng is not None else random).shuffle(self._cards)
+        self.left = self.size
+
+    def __str__(self):
+        return f'[size:{self.size}, cards:{str(self._cards[:self.left])}]'
+
+    def __len__(self):
+        return self.left
+
+    def draw(self) -> 'Card | None':
+        if self.left == 0:
+            return None
+        self.left -= 1
+        return self._cards[self.left]
+
+    # The cards still to be drawn, the next one last.
+    @property
+    def cards(self) -> List['Card']:
+        return self._cards[:self.left]
+
+    # The card the next draw will return.
+    def peek(self) -> 'Card | None':
+        return self._cards[self.left - 1] if self.left else None
+
+    def fork(self) -> 'Deck':
+        deck = Deck(self._cards, shuffle=False)
+        deck.left = self.left
+        return deck
+
+    @staticmethod
+    def normal_deck(rng: random.Random | None = None) -> 'Deck':
+        cards: List[Card] = []
+        for c in CARDS:
+            cards += [c] * COPIES[c.index]
+        return Deck(cards, rng)
+
+
+def card_from_color_rank(color_rank: Tuple[Color, Rank]) -> 'Card':
+    return CARDS[IDENTITY[color_rank]]
+
+
+def card_from_index(index: int) -> 'Card':
+    return CARDS[index]
+
+
+# There is exactly one Card per identity (see CARDS), shared by every deck, hand and slot, so cards compare and hash by identity and never need to be copied.
+class Card():
+    __slots__ = ('color', 'rank', 'index', 'color_rank')
+    color: Color
+    rank: Rank
+    index: int
+    color_rank: ColorRank
+
+    def __init__(self, color: Color, rank: Rank):
+        assert rank != 0
+        object.__setattr__(self, 'color', color)
+        object.__setattr__(self, 'rank', rank)
+        object.__setattr__(self, 'index', IDENTITY[color, rank])
+        object.__setattr__(self, 'color_rank', (color, rank))
+
+    def __setattr__(self, name: str, value: object):
+        raise AttributeError('Card is immutable')
+
+    # Unpickling and deepcopy hand back the shared instance.
+    def __reduce__(self):
+        return (card_from_index, (self.index,))
+
+    def __str__(self):
+        return f'{self.color.name}-{self.rank}'
+
+    def __repr__(self):
+        return self.__str__()
+
+
+CARDS: Tuple[Card, ...] = tuple(Card(c, r) for c, r in COLOR_RANKS)
+
+# Game.snapshot() and its parts.
+SlotState = Tuple[Card, int, set[ColorRank], bool, bool, bool, bool, bool]
+PlayerState = Tuple[Tuple[Card, ...], Tuple[SlotState, ...], bool, Tuple[int, ...], Tuple[int, ...], int, bytes, int, int,
+                    bytes, int]
+BoardState = Tuple[Tuple[Rank, ...], bytes, int, frozenset[Card], int, frozenset[Color], Rank]
+GameState = Tuple[int, BoardState, int, int, int, int, int | None, int, Result | None, bytes, bytes, Tuple[PlayerState, ...]]
+
+
+# Records games as a stream of events, one compact JSON array per line:
+#   ["g", players, deck, config]  new game, deck holds card indexes and is drawn from the end, config is the Config as an object
+#   ["d", player, card]           player drew a card, including the deal
+#   ["c", from, to, color, rank]  clue, color is a Color name and rank an int, the other is null
+#   ["p", player, idx, card]      player played the card in slot idx
+#   ["x", player, idx, card]      player discarded the card in slot idx
+#   ["s", strikes_left]           the play before was a strike
+#   ["o", result, score, turns]   game over
+# Games only call into the log when one is passed in, so a run without one pays nothing for it.
+class GameLog():
+    def __init__(self, out: TextIO):
+        self.out = out
+
+    def _write(self, *event: object):
+        self.out.write(json.dumps(event, separators=(',', ':')) + '\n')
+
+    def new_game(self, player_count: int, deck: 'Deck', config: Config):
+        self._write('g', player_count, [c.index for c in deck._cards[:deck.left]], asdict(config))  # type: ignore
+
+    def draw(self, player: int, card: 'Card'):
+        self._write('d', player, card.index)
+
+    def action(self, player: 'Player', action: Action):
+        match action:
+            case Play(idx):
+                self._write('p', player.id, idx, player.cards[idx].index)
+            case Discard(idx):
+                self._write('x', player.id, idx, player.cards[idx].index)
+            case Clue(to, color, rank):
+                self._write('c', player.id, to, color.name if color else None, int(rank) if rank else None)
+
+    def strike(self, strikes_left: int):
+        self._write('s', strikes_left)
+
+    def game_over(self, result: Result, score: int, turns: int):
+        self._write('o', result.name, score, turns)
+
+
+# Splits a log into the event lists of its games, in the order they were played.
+def read_log(lines: Iterable[str]) -> List[List[list]]:
+    games: List[List[list]] = []
+    for line in lines:
+        event = json.loads(line)
+        if event[0] == 'g':
+            games.append([])
+        games[-1].append(event)
+    return games
+
+
+def _logged_action(event: list) -> Action | None:
+    match event:
+        case ['p', _, idx, _]:
+            return Play(idx)
+        case ['x', _, idx, _]:
+            return Discard(idx)
+        case ['c', _, to, color, rank]:
+            return Clue(to, Color[color] if color else None, Rank(rank) if rank else None)
+    return None
+
+
+# Rebuilds a logged game as it stood after its first `turn` actions, or at the end if turn is None.
+def replay(events: List[list], turn: int | None = None) -> Game:
+    _, player_count, order, config = events[0]
+    deck = Deck([CARDS[i] for i in order], shuffle=False)
+    game = Game(player_count=player_count, sim=Tally(), deck=deck, config=Config(**config))
+    actions = [a for a in map(_logged_action, events) if a is not None]
+    for action in actions[:turn]:
+        game.step(action)
+    if turn is None:
+        game.step()  # the final turn ends the game without an action
+        assert game.score == events[-1][2], 'log does not match this version of the engine'
+    return game
+
+
+# Counts how often each Player.prompt rule fires and how long each takes, including the time spent in rules that came up empty.
+# Also counts the play clue candidates that were evaluated, and why the rejected ones were turned down.
+class Instrumentation():
+    def __init__(self):
+        self.hits: dict[str, int] = collections.defaultdict(int)
+        self.seconds: dict[str, float] = collections.defaultdict(float)
+        self.candidates = 0
+        self.accepted = 0
+        self.rejections: dict[str, int] = collections.defaultdict(int)
+
+    def prompt(self, player: 'Player') -> Action:
+        features = Features(player)
+        for rule in player.rules:
+            start = time.perf_counter()
+            action = rule(player, features)
+            self.seconds[rule.name] += time.perf_counter() - start
+            if action is not None:
+                self.hits[rule.name] += 1
+                return action
+        raise AssertionError('play_chop always acts')
+
+    def candidate(self, rejection: str | None):
+        self.candidates += 1
+        if rejection is None:
+            self.accepted += 1
+        else:
+            self.rejections[rejection] += 1
+
+    def merge(self, other: 'Instrumentation'):
+        for name, hits in other.hits.items():
+            self.hits[name] += hits
+        for name, seconds in other.seconds.items():
+            self.seconds[name] += seconds
+        self.candidates += other.candidates
+        self.accepted += other.accepted
+        for reason, count in other.rejections.items():
+            self.rejections[reason] += count
+
+    def to_dict(self) -> dict[str, object]:
+        return {'hits': dict(self.hits), 'seconds': dict(self.seconds), 'candidates': self.candidates,
+                'accepted': self.accepted, 'rejections': dict(self.rejections)}
+
+    @staticmethod
+    def from_dict(d: dict) -> 'Instrumentation':
+        out = Instrumentation()
+        out.hits.update(d['hits'])
+        out.seconds.update(d['seconds'])
+        out.candidates = d['candidates']
+        out.accepted = d['accepted']
+        out.rejections.update(d['rejections'])
+        return out
+
+    def __str__(self):
+        turns = sum(self.hits.values())
+        rules = ' '.join(f'{name}:{self.hits[name]}/{self.seconds[name]*1e6/max(turns, 1):.1f}us'
+                         for name in self.seconds)
+        rejections = ' '.join(f'{reason}:{count}' for reason, count in sorted(self.rejections.items()))
+        return f'rules(hits/us per turn): {rules}\nplay_clues: candidates:{self.candidates} accepted:{self.accepted} {rejections}'
+
+
+# Games are seeded from the run seed and their index, so a game plays out the same no matter which worker runs it.
+def game_seed(seed: int, game: int) -> int:
+    return (seed << 32) | game
+
+
+MAX_SCORE = 25
+
+
+# Upper bound on the score of a deck even with every card known to everyone. It keeps only two limits: a card can't be
+# played before someone draws it, and one card is played per turn. Every turn before the deck runs out draws at most one
+# card, and there are players turns after that. A card is ready once its earliest copy is drawn and the rank below was
+# played a turn earlier. The most cards that fit is then found by going from the latest ready turn down, keeping a card
+# unless the cards kept from there on no longer fit in the turns that are left. Dropping the latest card is never worse,
+# and it's always the top of its color, so the ranks kept stay in order.
+def score_bound(deck: 'Deck', players: int, hand_size: int, max_turns: int) -> int:
+    order = deck.cards[::-1]
+    dealt = players * hand_size
+    turns = min(max(len(order) - dealt, 0) + players, max_turns)
+    drawn = [1 << 20] * len(COLOR_RANKS)  # draws before the earliest copy is in a hand
+    for q, c in enumerate(order):
+        drawn[c.index] = min(drawn[c.index], max(0, q - dealt + 1))
+    ready: List[int] = []
+    for color in range(len(Color)):
+        t = -1
+        for rank in range(5):
+            t = max(drawn[color * 5 + rank], t + 1)
+            ready.append(t)
+    points = 0
+    for t in sorted(ready, reverse=True):
+        points = max(0, min(points + 1, turns - t))
+    return points
+
+
+# score_bound of a deck that's about to be played with config, worked out where the deck is built so it costs no extra
+# shuffle and adds up in the stats with the scores.
+def deck_bound(deck: 'Deck', config: Config) -> int:
+    return score_bound(deck, config.player_count, config.hand_size, config.max_turns)
+
+
+# Score statistics that take the same memory after 100 games as after 100M. Scores are small ints, so everything is kept as
+# integer counts: a score histogram per Result. Mean, variance and percentiles come out of those exactly, and stats from
+# separate shards merge by adding counts, giving the same numbers no matter how a run was split up.
+# bound is the total deck_bound of the games, for Simulator.efficiency.
+class ScoreStats():
+    def __init__(self):
+        self.histograms: dict[Result, List[int]] = {r: [0] * (MAX_SCORE + 1) for r in Result}
+        self.count = 0
+        self.total = 0
+        self.squares = 0
+        self.bound = 0
+
+    def add(self, score: int, result: Result, n: int = 1):
+        self.histograms[result][score] += n
+        self.count += n
+        self.total += score * n
+        self.squares += score * score * n
+
+    def merge(self, other: 'ScoreStats'):
+        for result, histogram in other.histograms.items():
+            mine = self.histograms[result]
+            for score, n in enumerate(histogram):
+                mine[score] += n
+        self.count += other.count
+        self.total += other.total
+        self.squares += other.squares
+        self.bound += other.bound
+
+    @property
+    def histogram(self) -> List[int]:
+        return [sum(h[score] for h in self.histograms.values()) for score in range(MAX_SCORE + 1)]
+
+    @property
+    def results(self) -> dict[Result, int]:
+        return {r: sum(h) for r, h in self.histograms.items()}
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count
+
+    # sample variance
+    @property
+    def variance(self) -> float:
+        if self.count < 2:
+            return 0.0
+        return (self.squares - self.total * self.total / self.count) / (self.count - 1)
+
+    @property
+    def max(self) -> int:
+        return max(score for score, n in enumerate(self.histogram) if n)
+
+    # Nearest-rank percentile, p in [0, 100].
+    def percentile(self, p: float, result: Result | None = None) -> int:
+        histogram = self.histogram if result is None else self.histograms[result]
+        rank = max(1, -(-p * sum(histogram) // 100))
+        seen = 0
+        for score, n in enumerate(histogram):
+            seen += n
+            if seen >= rank:
+                return score
+        return MAX_SCORE
+
+    def result_mean(self, result: Result) -> float:
+        histogram = self.histograms[result]
+        n = sum(histogram)
+        return sum(score * k for score, k in enumerate(histogram)) / n if n else 0.0
+
+    # The histograms and bound are everything, the totals are worked out again when reading them back.
+    def to_dict(self) -> dict[str, object]:
+        return {'histograms': {r.name: list(h) for r, h in self.histograms.items()}, 'bound': self.bound}
+
+    @staticmethod
+    def from_dict(d: dict) -> 'ScoreStats':
+        out = ScoreStats()
+        for name, histogram in d['histograms'].items():
+            for score, n in enumerate(histogram):
+                if n:
+                    out.add(score, Result[name], n)
+        out.bound = d['bound']
+        return out
+
+    def __str__(self):
+        percentiles = ' '.join(f'p{p}:{self.percentile(p)}' for p in (10, 25, 50, 75, 90))
+        histogram = ' '.join(f'{score}:{n}' for score, n in enumerate(self.histogram) if n)
+        by_result = ' '.join(f'{r.name}:{n}@{self.result_mean(r):.2f}' for r, n in self.results.items() if n)
+        return (f'score_std:{self.variance ** 0.5:.4f} {percentiles}\n'
+                f'histogram: {histogram}\n'
+                f'by_result(games@average_score): {by_result}')
+
+
+# Writes obj as JSON to a file next to path and renames it over path, so a reader, or a crash part way through, never
+# sees half of it.
+def _write_json(path: str, obj: object):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(obj, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# Progress of a run while it plays: games and turns per second, ETA, the running average score and result rates, and in
+# parallel runs each worker's games per second while busy. add() is called per game or shard and only reports once
+# `interval` seconds have gone by, as a status line on stream and/or by rewriting the JSON file at path.
+class Telemetry():
+    # stats are the totals of any games before these, a resumed run's; Telemetry keeps its own copy and adds games to it as
+    # they're reported, which in a parallel run is ahead of the Simulator's, see _Progress.
+    def __init__(self, games: int, interval: float = 5.0, path: str | None = None, stream: TextIO | None = None,
+                 stats: ScoreStats | None = None):
+        self.games = games
+        self.interval = interval
+        self.path = path
+        self.stream = stream
+        self.stats = ScoreStats()
+        if stats is not None:
+            self.stats.merge(stats)
+        self.start = time.perf_counter()
+        self.due = self.start + interval
+        self.played = 0
+        self.turns = 0
+        self.workers: Dict[int, List[float]] = collections.defaultdict(lambda: [0, 0.0])  # pid -> [games, busy seconds]
+
+    def game(self, score: int, result: Result, turns: int):
+        self.stats.add(score, result)
+        self.played += 1
+        self.turns += turns
+        if time.perf_counter() >= self.due:
+            self.report()
+
+    def add(self, stats: ScoreStats, turns: int, worker: int, seconds: float):
+        self.stats.merge(stats)
+        self.played += stats.count
+        self.turns += turns
+        busy = self.workers[worker]
+        busy[0] += stats.count
+        busy[1] += seconds
+        if time.perf_counter() >= self.due:
+            self.report()
+
+    def to_dict(self) -> dict[str, object]:
+        stats = self.stats
+        elapsed = time.perf_counter() - self.start
+        rate = self.played / elapsed if elapsed else 0.0
+        results = stats.results
+        return {'games': self.played, 'of': self.games, 'seconds': elapsed, 'games_per_second': rate,
+                'turns_per_second': self.turns / elapsed if elapsed else 0.0,
+                'eta_seconds': (self.games - self.played) / rate if rate else None,
+                'average_score': stats.total / stats.count if stats.count else 0.0,
+                'rates': {r.name: n / stats.count if stats.count else 0.0 for r, n in results.items()},
+                'workers': {str(pid): n / seconds if seconds else 0.0 for pid, (n, seconds) in self.workers.items()}}
+
+    def report(self):
+        self.due = time.perf_counter() + self.interval
+        d = self.to_dict()
+        if self.path is not None:
+            _write_json(self.path, d)
+        if self.stream is not None:
+            eta = f'{d["eta_seconds"]:.0f}s' if d['eta_seconds'] is not None else '?'
+            rates = ' '.join(f'{name.lower()}:{rate:.4f}' for name, rate in d['rates'].items())  # type: ignore
+            workers = ' '.join(f'{pid}:{rate:.1f}' for pid, rate in d['workers'].items())  # type: ignore
+            print(f'games:{d["games"]}/{self.games} games_per_second:{d["games_per_second"]:.1f} '
+                  f'turns_per_second:{d["turns_per_second"]:.0f} eta:{eta} average_score:{d["average_score"]:.4f} {rates}'
+                  + (f' workers(games/s): {workers}' if workers else ''), file=self.stream, flush=True)
+
+
+# What a Game reports its result to: a Simulator, a Tally, or nobody.
+class Reporter(Protocol):
+    def report(self, score: int, result: Result): ...
+
+
+# Where forked games report their result when nobody's listening.
+class _Detached():
+    def report(self, score: int, result: Result):
+        pass
+
+
+_DETACHED = _Detached()
+
+
+# Collects the results of a range of games inside a worker process.
+# keep_games also records (game, score, result, bound) for every game, for saving to a ResultStore.
+class Tally():
+    def __init__(self, instrument: bool = False, keep_games: bool = False):
+        self.stats = ScoreStats()
+        self.log = ''
+        self.instrument = Instrumentation() if instrument else None
+        self.games: List[Tuple[int, int, Result, int]] | None = [] if keep_games else None
+        self.turns = 0
+        self.seconds = 0.0
+        self.worker = os.getpid()
+
+    def report(self, score: int, result: Result):
+        self.stats.add(score, result)
+
+
+# A worker's games since it last told the parent's Telemetry, sent through queue every interval seconds so reports keep
+# to the interval however long a shard takes.
+class _Progress():
+    def __init__(self, queue: 'multiprocessing.Queue[Tuple[ScoreStats, int, int, float]]', interval: float):
+        self.queue = queue
+        self.interval = interval
+        self.worker = os.getpid()
+        self.restart()
+
+    def restart(self):
+        self.stats = ScoreStats()
+        self.turns = 0
+        self.start = time.perf_counter()
+
+    def game(self, score: int, result: Result, turns: int):
+        self.stats.add(score, result)
+        self.turns += turns
+        if time.perf_counter() - self.start >= self.interval:
+            self.flush()
+
+    def flush(self):
+        if self.stats.count:
+            self.queue.put((self.stats, self.turns, self.worker, time.perf_counter() - self.start))
+        self.restart()
+
+
+# Set in each worker by _init_worker when the run has telemetry.
+_progress: _Progress | None = None
+
+
+def _init_worker(queue: 'multiprocessing.Queue[Tuple[ScoreStats, int, int, float]] | None', interval: float):
+    global _progress
+    _progress = _Progress(queue, interval) if queue is not None else None
+
+
+# Plays games start..stop of a run, reporting them to tally, and to progress if given.
+def run_games(tally: Tally, config: Config, seed: int, start: int, stop: int, debug: bool = False, log: GameLog | None = None,
+              progress: '_Progress | None' = None):
+    for i in range(start, stop):
+        if debug:
+            print()
+            print('new_game')
+        deck = Deck.normal_deck(random.Random(game_seed(seed, i)))
+        bound = deck_bound(deck, config)
+        tally.stats.bound += bound
+        g = Game(sim=tally, deck=deck, debug=debug, log=log, instrument=tally.instrument, config=config)
+        result = g.run()
+        tally.turns += g.turns
+        if progress is not None:
+            progress.game(g.score, result, g.turns)
+        if tally.games is not None:
+            tally.games.append((i, g.score, result, bound))
+
+
+def _run_shard(shard: Tuple[Config, int, int, int, bool, bool, bool, bool]) -> Tally:
+    config, seed, start, stop, debug, logging, instrument, keep_games = shard
+    tally = Tally(instrument, keep_games)
+    out = io.StringIO() if logging else None
+    began = time.perf_counter()
+    if _progress is not None:
+        _progress.restart()  # not counting the time waiting for this shard
+    run_games(tally, config, seed, start, stop, debug, GameLog(out) if out is not None else None, _progress)
+    tally.seconds = time.perf_counter() - began
+    if _progress is not None:
+        _progress.flush()  # before the tally, so the parent has every game's progress once it has every tally
+    if out is not None:
+        tally.log = out.getvalue()
+    return tally
+
+
+# Contiguous runs of sorted game indexes, as (start, stop) ranges.
+def _ranges(games: List[int]) -> List[Tuple[int, int]]:
+    ranges: List[Tuple[int, int]] = []
+    for i in games:
+        if ranges and ranges[-1][1] == i:
+            ranges[-1] = (ranges[-1][0], i + 1)
+        else:
+            ranges.append((i, i + 1))
+    return ranges
+
+
+class Simulator():
+    # log is the path of a GameLog file to write every game to, see replay() for reading it back.
+    # instrument collects per-rule counts and timings of every prompt across the run into self.instrument.
+    # store is a ResultStore: games it already has for this code version, config and seed are read back instead of played,
+    # and the ones played are added to it. The log and instrumentation only cover the games actually played.
+    # verbose=False prints nothing, for callers that report the results themselves, see summary() and to_dict().
+    # checkpoint is a path the run's totals so far are saved to every checkpoint_every games, see _checkpoint(). With
+    # resume, a run that finds a checkpoint of the same version, config and seed there carries on after its last game, and
+    # ends with the same stats as if it had never stopped. A store keeps every game already, so it doesn't take both.
+    # telemetry is the number of seconds between Telemetry reports on stderr, 0 for the old 10% steps when verbose;
+    # telemetry_path is a JSON file the same figures are rewritten to.
+    def __init__(self, runs: int = 1, workers: int = 1, seed: int | None = None, log: str | None = None, instrument: bool = False,
+                 config: Config | None = None, store: 'ResultStore | None' = None,
+                 verbose: bool = True, checkpoint: str | None = None, checkpoint_every: int = 10000, resume: bool = False,
+                 telemetry: float = 0.0, telemetry_path: str | None = None):
+        if checkpoint is not None and store is not None:
+            raise ValueError('a store already keeps the games played, resume from it instead of a checkpoint')
+        self.stats = ScoreStats()
+        self.config = config if config is not None else Config()
+        self.runs = runs
+        self.workers = workers
+        self.seed = seed if seed is not None else random.randrange(2**32)
+        self.log_path = log
+        self.verbose = verbose
+        self.instrument = Instrumentation() if instrument else None
+        self.store = store
+        self.games: List[Tuple[int, int, Result, int]] | None = [] if store is not None else None
+        self.checkpoint_path = checkpoint
+        self.checkpoint_every = checkpoint_every
+        self.next = 0  # games before this one are in the stats
+        self.resumed = 0
+        self._log_offset = 0
+        self.telemetry_interval = telemetry
+        self.telemetry_path = telemetry_path
+        self.telemetry: Telemetry | None = None
+        if resume and checkpoint is not None and os.path.exists(checkpoint):
+            self._resume()
+        self._run()
+
+    @property
+    def results(self) -> dict[Result, int]:
+        return self.stats.results
+
+    def _run(self):
+        debug = self.verbose and self.runs < 10
+        todo = self.store.missing(self.config, self.seed, self.runs) if self.store is not None else list(range(self.next, self.runs))
+        if self.telemetry_interval > 0:
+            self.telemetry = Telemetry(len(todo), self.telemetry_interval, self.telemetry_path, sys.stderr, self.stats)
+        if self.resumed and self.log_path:
+            os.truncate(self.log_path, self._log_offset)  # drop games logged after the checkpoint
+        with open(self.log_path, 'a' if self.resumed else 'w') if self.log_path else contextlib.nullcontext() as out:
+            if self.workers > 1:
+                self._run_parallel(todo, debug, out)
+            else:
+                self._run_serial(todo, debug, out)
+            if self.checkpoint_path is not None:
+                self._checkpoint(out)
+        self.played = self.resumed + len(todo)
+        if self.telemetry is not None:
+            self.telemetry.report()
+        if self.store is not None:
+            self._save()
+            # built here rather than by the store, which may have imported this module separately when it's run as a script
+            self.stats = ScoreStats()
+            for score, result, n in self.store.counts(self.config, self.seed, self.runs):
+                self.stats.add(score, Result[result], n)
+            bound, unbounded = self.store.bounds(self.config, self.seed, self.runs)
+            if unbounded:  # stored before bounds were, worked out once and kept
+                filled = [(i, deck_bound(Deck.normal_deck(random.Random(game_seed(self.seed, i))), self.config))
+                          for i in unbounded]
+                self.store.fill_bounds(self.config, self.seed, filled)
+                bound += sum(b for _, b in filled)
+            self.stats.bound = bound
+        self.bound = self.stats.bound
+        if self.verbose:
+            print()
+            print(self.summary())
+
+    def _rates(self) -> Dict[str, float]:
+        results = self.results
+        # TODO add statistics for no playables, which is technically a bottomout
+        return {'strikeout_rate': results[Result.STRIKE_OUT] / self.runs, 'bottomout_rate': results[Result.BOTTOM_OUT] / self.runs,
+                'victory_rate': results[Result.VICTORY] / self.runs}
+
+    def summary(self) -> str:
+        lines = []
+        if self.store is not None:
+            lines += [f'stored_games:{self.runs - self.played} played_games:{self.played}', '']
+        if self.resumed:
+            lines += [f'resumed_games:{self.resumed} from {self.checkpoint_path}', '']
+        rates = ' '.join(f'{k}:{v}' for k, v in self._rates().items())
+        lines += [f'simulations:{self.runs} average_score:{self.stats.mean} max_score:{self.stats.max} {rates}',
+                  f'average_score_bound:{self.bound / self.runs:.4f} efficiency:{self.efficiency:.4f}', str(self.stats)]
+        if self.instrument is not None:
+            lines.append(str(self.instrument))
+        return '\n'.join(lines)
+
+    # Score as a share of what the decks allow, see score_bound.
+    @property
+    def efficiency(self) -> float:
+        return self.stats.total / self.bound if self.bound else 1.0
+
+    def to_dict(self) -> dict[str, object]:
+        stats = self.stats
+        out: dict[str, object] = {
+            'config': asdict(self.config), 'seed': self.seed, 'simulations': self.runs, 'played_games': self.played,
+            'average_score': stats.mean, 'score_std': stats.variance ** 0.5, 'max_score': stats.max, **self._rates(),
+            'average_score_bound': self.bound / self.runs, 'efficiency': self.efficiency,
+            'histogram': stats.histogram, 'results': {r.name: n for r, n in self.results.items()}}
+        if self.instrument is not None:
+            out['instrument'] = self.instrument.to_dict()
+        return out
+
+    def _run_serial(self, todo: List[int], debug: bool, out: TextIO | None):
+        log = GameLog(out) if out is not None else None
+        increments = 10
+        for n, i in enumerate(todo):
+            if debug:
+                print()
+                print('new_game')
+            if n % (len(todo)/increments) == 0 and n != 0 and self.verbose and not debug and self.telemetry is None:
+                print(f'{int(n/len(todo)*100)}%')
+            deck = Deck.normal_deck(random.Random(game_seed(self.seed, i)))
+            bound = deck_bound(deck, self.config)
+            self.stats.bound += bound
+            # deck._cards[-5] = Card(Color.BLU, Rank.ONE)  # type: ignore
+            # deck._cards[-6] = Card(Color.BLU, Rank.ONE)  # type: ignore
+            g = Game(sim=self, deck=deck, debug=debug, log=log, instrument=self.instrument, config=self.config)
+            result = g.run()
+            if self.telemetry is not None:
+                self.telemetry.game(g.score, result, g.turns)
+            if self.games is not None:
+                self.games.append((i, g.score, result, bound))
+                if len(self.games) >= 1000:
+                    self._save()
+            del g
+            self.next = i + 1
+            if self.checkpoint_path is not None and (n + 1) % self.checkpoint_every == 0:
+                self._checkpoint(out)
+
+    # Shards the games across a process pool. Shards are merged in game order, so the results match a serial run with the same seed.
+    def _run_parallel(self, todo: List[int], debug: bool, out: TextIO | None):
+        increments = 10
+        # a few shards per worker keeps the pool busy without paying much per-task overhead
+        shard_size = max(1, len(todo) // (self.workers * 8))
+        shards = [(self.config, self.seed, start, min(start + shard_size, stop), debug, out is not None,
+                   self.instrument is not None, self.store is not None)
+                  for first, stop in _ranges(todo) for start in range(first, stop, shard_size)]
+        done = 0
+        saved = self.next
+        queue: 'multiprocessing.Queue[Tuple[ScoreStats, int, int, float]] | None' = None
+        if self.telemetry is not None:
+            queue = multiprocessing.Queue()
+        with multiprocessing.Pool(self.workers, _init_worker, (queue, self.telemetry_interval)) as pool:
+            tallies = pool.imap(_run_shard, shards)
+            for shard in shards:
+                tally = self._next_tally(tallies, queue)
+                if out is not None:
+                    out.write(tally.log)
+                if self.instrument is not None and tally.instrument is not None:
+                    self.instrument.merge(tally.instrument)
+                self.stats.merge(tally.stats)
+                if self.games is not None and tally.games is not None:
+                    self.games.extend(tally.games)
+                    self._save()
+                self.next = shard[3]
+                if self.checkpoint_path is not None and self.next - saved >= self.checkpoint_every:
+                    saved = self.next
+                    self._checkpoint(out)
+                played = self.stats.count - self.resumed
+                progress = played * increments // len(todo)
+                if progress > done and played != len(todo) and self.verbose and not debug and self.telemetry is None:
+                    done = progress
+                    print(f'{done * increments}%')
+            if self.telemetry is not None and queue is not None:
+                # the workers sent the last of it before their tallies, but it may still be on its way
+                while self.telemetry.played < len(todo):
+                    self.telemetry.add(*queue.get())
+
+    # Waits for the next shard's tally, passing the workers' progress to Telemetry meanwhile.
+    def _next_tally(self, tallies: 'multiprocessing.pool.IMapIterator[Tally]', queue: 'multiprocessing.Queue[Tuple[ScoreStats, int, int, float]] | None') -> Tally:
+        if self.telemetry is None or queue is None:
+            return tallies.next()
+        while True:
+            while not queue.empty():
+                self.telemetry.add(*queue.get())
+            try:
+                return tallies.next(min(self.telemetry_interval, 0.1))
+            except multiprocessing.TimeoutError:
+                pass
+
+    # Saving as games finish means an interrupted run keeps what it got through.
+    def _save(self):
+        if self.store is not None and self.games:
+            self.store.add(self.config, self.seed, self.games)
+            self.games.clear()
+
+    # The stats of every game before self.next and where the log had got to, see _write_json for why being stopped part
+    # way through leaves the previous checkpoint whole.
+    def _checkpoint(self, out: TextIO | None):
+        from .store import strategy_version  # store imports this module
+        assert self.checkpoint_path is not None
+        if out is not None:
+            out.flush()
+        state = {'version': strategy_version(), 'config': asdict(self.config), 'seed': self.seed, 'next': self.next,
+                 'log': out is not None, 'log_offset': out.tell() if out is not None else 0, 'stats': self.stats.to_dict(),
+                 'instrument': self.instrument.to_dict() if self.instrument is not None else None}
+        _write_json(self.checkpoint_path, state)
+
+    def _resume(self):
+        from .store import strategy_version
+        assert self.checkpoint_path is not None
+        with open(self.checkpoint_path) as f:
+            state = json.load(f)
+        if (state['version'], state['config'], state['seed']) != (strategy_version(), asdict(self.config), self.seed):
+            raise ValueError(f'{self.checkpoint_path} is a checkpoint of a different version, config or seed')
+        if state['next'] > self.runs:
+            raise ValueError(f'{self.checkpoint_path} is already past game {self.runs}')
+        # the log carries on from where the checkpoint left it, so it has to be the one that was being written
+        if state['log'] != (self.log_path is not None):
+            raise ValueError(f'{self.checkpoint_path} was written {"with" if state["log"] else "without"} a log, '
+                             f'resume it the same way')
+        if self.log_path is not None and (not os.path.exists(self.log_path)
+                                          or os.path.getsize(self.log_path) < state['log_offset']):
+            raise ValueError(f'{self.log_path} is missing or shorter than at the checkpoint, the log can not be resumed')
+        self.stats = ScoreStats.from_dict(state['stats'])
+        if self.instrument is not None and state['instrument'] is not None:
+            self.instrument = Instrumentation.from_dict(state['instrument'])
+        self.next = self.resumed = state['next']
+        self._log_offset = state['log_offset']
+
+    def report(self, score: int, result: Result):
+        self.stats.add(score, result)
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) >= 2 else 10000
+    workers = int(sys.argv[2]) if len(sys.argv) >= 3 else 1
+    log = sys.argv[3] if len(sys.argv) >= 4 else None
+    seed = int(sys.argv[4]) if len(sys.argv) >= 5 and sys.argv[4] else None
+    store = None
+    if len(sys.argv) >= 6:
+        from . import store as results  # ResultStore itself is only imported for type checking
+        store = results.ResultStore(sys.argv[5])
+    Simulator(runs, workers=workers, seed=seed, log=f'{log}.big' if log else None, config=Config(big_touches=True), store=store)
+    Simulator(runs, workers=workers, seed=seed, log=f'{log}.small' if log else None, config=Config(big_touches=False), store=store)
@@ -0,0 +1,87 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+from typing import List
+
+from .server import Latency
+
+# Drives many simulated people against a running server.py, each alone with bots at a table of their own. They play a
+# simple legal policy: clue the next player the color of their first card while there are tokens, otherwise discard the
+# first card. Reports how long the server takes from a move to the state that follows it, and moves per second overall.
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+
+
+def _move(state: dict) -> dict:
+    if state['clue_tokens']:
+        to = (state['seat'] + 1) % (len(state['hands']) + 1)
+        return {'op': 'clue', 'to': to, 'color': state['hands'][str(to)][0].split('-')[0]}
+    return {'op': 'discard', 'idx': 0}
+
+
+async def client(name: str, host: str, port: int, players: int, seed: int, config: dict, turnaround: Latency) -> int:
+    reader, writer = await asyncio.open_connection(host, port, limit=2**20)
+    moves = 0
+    try:
+        await _send(writer, {'op': 'join', 'table': name, 'players': players, 'humans': 1, 'seed': seed, 'config': config})
+        sent = None
+        while line := await reader.readline():
+            message = json.loads(line)
+            if message['type'] == 'error':
+                raise RuntimeError(f'{name}: {message["message"]}')
+            if message['type'] == 'over':
+                break
+            if message['type'] != 'state':
+                continue
+            if sent is not None:
+                turnaround.add(time.perf_counter() - sent)
+                sent = None
+            if message['your_turn']:
+                sent = time.perf_counter()
+                moves += 1
+                await _send(writer, _move(message))
+    finally:
+        writer.close()
+    return moves
+
+
+async def stats(host: str, port: int) -> dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    await _send(writer, {'op': 'stats'})
+    reply = json.loads(await reader.readline())
+    writer.close()
+    return reply
+
+
+async def load(clients: int, host: str, port: int, players: int, config: dict):
+    turnaround = Latency()
+    start = time.perf_counter()
+    moves = await asyncio.gather(*(client(f'load-{start}-{i}', host, port, players, i, config, turnaround)
+                                   for i in range(clients)))
+    elapsed = time.perf_counter() - start
+    print(f'clients:{clients} seconds:{elapsed:.2f} human_moves:{sum(moves)} human_moves_per_second:{sum(moves) / elapsed:.1f}')
+    print(f'turnaround {json.dumps(turnaround.to_dict())}')
+    print(f'server {json.dumps(await stats(host, port))}')
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Load test a running server.py with simulated people.')
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--max-turns', type=int, default=1000)
+    parser.add_argument('--max-clue-tokens', type=int, default=8)
+    args = parser.parse_args(argv)
+    asyncio.run(load(args.clients, args.host, args.port, args.players,
+                     {'max_turns': args.max_turns, 'max_clue_tokens': args.max_clue_tokens}))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,335 @@
+import io
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import collections
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, List, Set
+
+from .game import Game, Deck, Tally, Config, GameLog, Action, Play, Discard, Clue, Color, Rank, COLOR_RANKS, game_seed
+
+# Hosts tables where some seats are bots and the rest are people connected over TCP on localhost. Every message is one
+# JSON object per line.
+#
+# client -> server
+#   {"op": "join", "table": name, "players": 4, "humans": 1, "seed": 0, "config": {...}}
+#       sits at the next free human seat, creating the table with the other fields if it doesn't exist yet. The table
+#       starts once every human seat is taken.
+#   {"op": "play", "idx": 0}  {"op": "discard", "idx": 0}  {"op": "clue", "to": 2, "color": "RED"} or "rank": 3
+#   {"op": "stats"}
+# server -> client
+#   {"type": "joined", "table": name, "seat": 1}
+#   {"type": "state", ...}          after every move, see view(). your_turn says whether to send a move.
+#   {"type": "over", "result": "STRIKE_OUT", "score": 9}
+#   {"type": "error", "message": "..."}
+#   {"type": "stats", ...}          see Server.stats()
+#
+# Bots think in a thread pool, so a table whose bots are busy doesn't hold up the others. A person who disconnects is
+# replaced by a bot for the rest of the game.
+
+
+# Timings of the last `keep` events, for percentiles, plus running totals over all of them.
+class Latency():
+    def __init__(self, keep: int = 10000):
+        self.samples: Deque[float] = collections.deque(maxlen=keep)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def to_dict(self) -> Dict[str, float]:
+        return {'count': self.count, 'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+                'p50_ms': self.percentile(50) * 1000, 'p99_ms': self.percentile(99) * 1000, 'max_ms': self.max * 1000}
+
+
+def parse_action(message: dict) -> Action:
+    match message.get('op'):
+        case 'play':
+            return Play(int(message['idx']))
+        case 'discard':
+            return Discard(int(message['idx']))
+        case 'clue':
+            color, rank = message.get('color'), message.get('rank')
+            if (color is None) == (rank is None):
+                raise ValueError('a clue is a color or a rank')
+            if rank is not None and not 1 <= int(rank) <= 5:
+                raise ValueError('a rank clue is 1 to 5')
+            return Clue(int(message['to']), Color[color] if color is not None else None,
+                        Rank(int(rank)) if rank is not None else None)
+    raise ValueError(f'unknown op {message.get("op")}')
+
+
+# Why a person's move isn't allowed, or None. Bots only make legal moves, so the engine mostly asserts; people get told.
+def illegal(game: Game, seat: int, action: Action) -> str | None:
+    player = game.players[seat]
+    match action:
+        case Play(idx) | Discard(idx):
+            if not 0 <= idx < len(player.cards):
+                return f'no card in slot {idx}'
+            if isinstance(action, Discard) and not game.can_discard:
+                return 'clue tokens are full, discarding is not allowed'
+        case Clue(to, color, rank):
+            if not game.can_clue:
+                return 'no clue tokens left'
+            if to == seat or not 0 <= to < len(game.players):
+                return f'can not clue player {to}'
+            if not game.players[to].touch_mask(color, rank):
+                return 'a clue has to touch at least one card'
+    return None
+
+
+# What the person in seat can see: everyone else's cards, and for their own slots what they know each could be.
+def view(game: Game, seat: int, events: List[list]) -> dict:
+    me = game.players[seat]
+    return {
+        'type': 'state',
+        'seat': seat,
+        'your_turn': not game.over and (game.player_turn + 1) % len(game.players) == seat,
+        'turn': game.turns,
+        'clue_tokens': game.clue_tokens,
+        'max_clue_tokens': game.config.max_clue_tokens,
+        'strikes_left': game.remaining_strikes,
+        'score': game.score,
+        'deck': game.deck.left,
+        'stacks': {c.name: int(s.rank) for c, s in game.board.stacks.items()},
+        'hands': {p.id: [str(c) for c in p.cards] for p in game.players if p.id != seat},
+        'knowledge': [[f'{c.name}-{int(r)}' for i, (c, r) in enumerate(COLOR_RANKS) if s.mask >> i & 1] for s in me.slots],
+        'clued': [s.clued for s in me.slots],
+        'events': events,
+    }
+
+
+class Seat():
+    def __init__(self):
+        self.writer: asyncio.StreamWriter | None = None
+        self.moves: asyncio.Queue[Action | None] = asyncio.Queue()
+
+    @property
+    def connected(self) -> bool:
+        return self.writer is not None
+
+    async def send(self, message: dict):
+        if self.writer is None:
+            return
+        try:
+            self.writer.write(json.dumps(message).encode() + b'\n')
+            await self.writer.drain()
+        except ConnectionError:
+            self.leave()
+
+    def leave(self):
+        self.writer = None
+        self.moves.put_nowait(None)
+
+    # Drops moves that were sent for a turn that's over.
+    def clear(self):
+        while not self.moves.empty():
+            self.moves.get_nowait()
+
+
+class Table():
+    def __init__(self, server: 'Server', name: str, players: int, humans: int, seed: int, config: Config):
+        self.server = server
+        self.name = name
+        self.out = io.StringIO()
+        self.game = Game(player_count=players, sim=Tally(), deck=Deck.normal_deck(random.Random(game_seed(seed, 0))),
+                         log=GameLog(self.out), config=config)
+        self.seats: Dict[int, Seat] = {i: Seat() for i in range(humans)}
+        self.waiting: List[int] = list(range(humans))
+        self.task: asyncio.Task | None = None
+        self.sent = 0
+        # Whether the game is over and whose turn it is, as of the last move. Bots move the game in the executor, so the
+        # event loop reads these instead of the game, and they're only updated on the loop once a move has finished.
+        self.over = False
+        self.to_move = self.turn
+
+    # The log lines written since last time, without the order of the deck and the cards people draw themselves.
+    def _events(self, seat: int) -> List[list]:
+        events = [json.loads(line) for line in self.out.getvalue()[self.sent:].splitlines()]
+        return [['g', e[1], None, e[3]] if e[0] == 'g' else ['d', e[1], None] if e[0] == 'd' and e[1] == seat else e
+                for e in events]
+
+    @property
+    def turn(self) -> int:
+        return (self.game.player_turn + 1) % len(self.game.players)
+
+    # Queues a person's move, or says why it can't be taken now.
+    def submit(self, seat: int, action: Action) -> str | None:
+        if self.task is None:
+            return 'the game has not started'
+        if self.over:
+            return 'the game is over'
+        if self.to_move != seat:
+            return 'it is not your turn'
+        if not self.seats[seat].moves.empty():
+            return 'you already sent a move for this turn'
+        self.seats[seat].moves.put_nowait(action)
+        return None
+
+    async def _broadcast(self):
+        for s in self.seats.values():
+            s.clear()  # the state changed, whatever was queued was decided on the old one
+        for seat, s in self.seats.items():
+            await s.send(view(self.game, seat, self._events(seat)))
+        self.sent = len(self.out.getvalue())
+
+    # After a move, with going what Game.step returned.
+    def _moved(self, going: bool):
+        self.over = not going
+        self.to_move = self.turn
+
+    # Plays the game out, and takes the table down even if the engine fails, so nobody waits on it forever.
+    async def run(self):
+        try:
+            await self._play()
+            assert self.game.result is not None
+            over = {'type': 'over', 'result': self.game.result.name, 'score': self.game.score}
+        except Exception as e:
+            over = {'type': 'over', 'result': None, 'score': self.game.score}
+            for s in self.seats.values():
+                await s.send({'type': 'error', 'message': f'table {self.name} stopped: {e!r}'})
+        finally:
+            self.server.finished(self)
+        for s in self.seats.values():
+            await s.send(over)
+
+    async def _play(self):
+        game = self.game
+        loop = asyncio.get_running_loop()
+        metrics = self.server.metrics
+        await self._broadcast()
+        while not self.over:
+            seat = self.seats.get(self.to_move)
+            if seat is None or not seat.connected:
+                start = time.perf_counter()
+                self._moved(await loop.run_in_executor(self.server.executor, game.step))
+                metrics['bot_move'].add(time.perf_counter() - start)
+                await self._broadcast()
+                continue
+            action = await seat.moves.get()
+            if action is None:
+                continue  # left, a bot takes over
+            start = time.perf_counter()
+            reason = illegal(game, self.to_move, action)
+            if reason is not None:
+                await seat.send({'type': 'error', 'message': reason})
+                continue
+            self._moved(game.step(action))
+            await self._broadcast()
+            metrics['human_move'].add(time.perf_counter() - start)
+
+
+class Server():
+    def __init__(self, bot_threads: int = 4):
+        self.tables: Dict[str, Table] = {}
+        self.executor = ThreadPoolExecutor(bot_threads)
+        self.metrics: Dict[str, Latency] = {'human_move': Latency(), 'bot_move': Latency()}
+        self.games_started = 0
+        self.games_finished = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    def stats(self) -> dict:
+        return {'type': 'stats', 'tables': len(self.tables), 'games_started': self.games_started,
+                'games_finished': self.games_finished, **{k: v.to_dict() for k, v in self.metrics.items()}}
+
+    def finished(self, table: Table):
+        self.games_finished += 1
+        self.tables.pop(table.name, None)
+
+    def _start(self, table: Table):
+        self.games_started += 1
+        task = asyncio.create_task(table.run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        table.task = task
+
+    def _join(self, message: dict, writer: asyncio.StreamWriter) -> tuple[Table, int]:
+        name = str(message['table'])
+        table = self.tables.get(name)
+        if table is None:
+            players = int(message.get('players', 4))
+            humans = int(message.get('humans', 1))
+            if not 1 <= humans <= players:
+                raise ValueError('humans has to be between 1 and players')
+            table = Table(self, name, players, humans, int(message.get('seed', random.randrange(2**32))),
+                          Config(**message.get('config', {})))
+            self.tables[name] = table
+        if not table.waiting:
+            raise ValueError(f'table {name} is full')
+        seat = table.waiting.pop(0)
+        table.seats[seat].writer = writer
+        if not table.waiting:
+            self._start(table)
+        return table, seat
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        table: Table | None = None
+        seat = -1
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                    if message.get('op') == 'stats':
+                        reply = self.stats()
+                    elif message.get('op') == 'join':
+                        if table is not None:
+                            raise ValueError('already seated')
+                        table, seat = self._join(message, writer)
+                        reply = {'type': 'joined', 'table': table.name, 'seat': seat}
+                    elif table is None:
+                        raise ValueError('join a table first')
+                    else:
+                        reason = table.submit(seat, parse_action(message))
+                        if reason is None:
+                            continue
+                        reply = {'type': 'error', 'message': reason}
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {'type': 'error', 'message': str(e)}
+                writer.write(json.dumps(reply).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if table is not None:
+                table.seats[seat].leave()
+                if table.task is None:  # not started yet, someone else can have the seat
+                    table.waiting.insert(0, seat)
+                    if not any(s.connected for s in table.seats.values()) and self.tables.get(table.name) is table:
+                        del self.tables[table.name]  # nobody left waiting at it
+            writer.close()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 8765):
+        server = await asyncio.start_server(self.handle, host, port, limit=2**20)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Host Hanabi tables for people and bots on localhost.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--bot-threads', type=int, default=4, help='threads the bots think in')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(Server(args.bot_threads).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
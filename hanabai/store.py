@@ -0,0 +1,115 @@
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+from dataclasses import asdict
+from typing import Iterable, List, Tuple
+
+from . import game
+from .game import Config, Result, ScoreStats
+
+SCHEMA = '''
+create table if not exists games (
+    version text not null,
+    config text not null,
+    seed integer not null,
+    game integer not null,
+    score integer not null,
+    result text not null,
+    bound integer,
+    primary key (version, config, seed, game)
+) without rowid
+'''
+
+
+# Hash of the engine source. Any edit to game.py counts as a new strategy, which can throw away results that would still
+# be valid, but never reuses ones that aren't.
+def strategy_version() -> str:
+    with open(game.__file__, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+
+def config_key(config: Config) -> str:
+    return json.dumps(asdict(config), sort_keys=True)
+
+
+# Per-game outcomes in SQLite, keyed by strategy version, config, seed and game index. A game's deck only depends on the
+# seed and its index, so a stored game is the same as replaying it under the same version and config.
+class ResultStore():
+    def __init__(self, path: str, version: str | None = None):
+        self.version = version if version is not None else strategy_version()
+        self.db = sqlite3.connect(path)
+        self.db.execute(SCHEMA)
+        if 'bound' not in {row[1] for row in self.db.execute('pragma table_info(games)')}:
+            self.db.execute('alter table games add column bound integer')  # stores from before game.score_bound
+
+    def _key(self, config: Config, seed: int) -> Tuple[str, str, int]:
+        return self.version, config_key(config), seed
+
+    # Game indexes below runs that aren't stored yet, in order.
+    def missing(self, config: Config, seed: int, runs: int) -> List[int]:
+        have = {row[0] for row in self.db.execute(
+            'select game from games where version = ? and config = ? and seed = ? and game < ?', (*self._key(config, seed), runs))}
+        return [i for i in range(runs) if i not in have]
+
+    # games are (game, score, result, bound), bound being game.deck_bound of the game's deck.
+    def add(self, config: Config, seed: int, games: Iterable[Tuple[int, int, Result, int]]):
+        key = self._key(config, seed)
+        with self.db:
+            self.db.executemany('insert or replace into games values (?, ?, ?, ?, ?, ?, ?)',
+                                ((*key, i, score, result.name, bound) for i, score, result, bound in games))
+
+    # Total bound of the stored games below runs, and the ones stored without a bound.
+    def bounds(self, config: Config, seed: int, runs: int) -> Tuple[int, List[int]]:
+        key = (*self._key(config, seed), runs)
+        where = 'where version = ? and config = ? and seed = ? and game < ?'
+        total = self.db.execute(f'select coalesce(sum(bound), 0) from games {where}', key).fetchone()[0]
+        missing = [row[0] for row in self.db.execute(f'select game from games {where} and bound is null', key)]
+        return total, missing
+
+    def fill_bounds(self, config: Config, seed: int, bounds: Iterable[Tuple[int, int]]):
+        key = self._key(config, seed)
+        with self.db:
+            self.db.executemany('update games set bound = ? where version = ? and config = ? and seed = ? and game = ?',
+                                ((bound, *key, i) for i, bound in bounds))
+
+    # (score, result name, games) counts of the stored games below runs, or all of them. version defaults to the store's own.
+    def counts(self, config: Config, seed: int, runs: int | None = None, version: str | None = None) -> List[Tuple[int, str, int]]:
+        key = (version if version is not None else self.version, config_key(config), seed)
+        return self.db.execute('select score, result, count(*) from games where version = ? and config = ? and seed = ? '
+                               'and (? is null or game < ?) group by score, result', (*key, runs, runs)).fetchall()
+
+    def stats(self, config: Config, seed: int, runs: int | None = None, version: str | None = None) -> ScoreStats:
+        stats = ScoreStats()
+        for score, result, n in self.counts(config, seed, runs, version):
+            stats.add(score, Result[result], n)
+        return stats
+
+    # (version, config, seed, games) for everything stored, optionally for one version only.
+    def runs(self, version: str | None = None) -> List[Tuple[str, Config, int, int]]:
+        rows = self.db.execute('select version, config, seed, count(*) from games '
+                               'where ? is null or version = ? group by version, config, seed', (version, version))
+        return [(v, Config(**json.loads(c)), seed, n) for v, c, seed, n in rows]
+
+    def close(self):
+        self.db.close()
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='List the runs in a results store, with their stats.')
+    parser.add_argument('path')
+    parser.add_argument('--version', help="only this strategy version, 'current' for the code as it is now")
+    args = parser.parse_args(argv)
+    store = ResultStore(args.path)
+    version = store.version if args.version == 'current' else args.version
+    for v, config, seed, n in store.runs(version):
+        stats = store.stats(config, seed, version=v)
+        current = ' (current)' if v == store.version else ''
+        print(f'version:{v}{current} seed:{seed} games:{n} average_score:{stats.mean:.4f} {config}')
+    store.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
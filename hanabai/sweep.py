@@ -0,0 +1,77 @@
+import sys
+import argparse
+import itertools
+import contextlib
+import dataclasses
+import multiprocessing
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .game import Config, Tally, ScoreStats, run_games, parse_config
+
+
+# Every combination of the given values, e.g. grid(big_touches=[True, False], max_clue_tokens=[6, 8]) is 4 configs.
+def grid(base: Config | None = None, **axes: Sequence[Any]) -> List[Config]:
+    base = base if base is not None else Config()
+    keys = list(axes)
+    return [dataclasses.replace(base, **dict(zip(keys, values))) for values in itertools.product(*axes.values())]
+
+
+def _run_job(job: Tuple[int, Config, int, int, int]) -> Tuple[int, ScoreStats]:
+    index, config, seed, start, stop = job
+    tally = Tally()
+    run_games(tally, config, seed, start, stop)
+    return index, tally.stats
+
+
+def _label(config: Config, base: Config) -> str:
+    changed = [f'{f.name}={getattr(config, f.name)}' for f in dataclasses.fields(Config)
+               if getattr(config, f.name) != getattr(base, f.name)]
+    return ' '.join(changed) or 'default'
+
+
+def _row(label: str, stats: ScoreStats) -> str:
+    return f'{label:<48} games:{stats.count:<7} average:{stats.mean:<8.4f} sd:{stats.variance ** 0.5:<7.4f} max:{stats.max}'
+
+
+# Plays the same `games` seeded decks under every config, fanning (config, chunk of games) jobs out over the workers.
+# Each config's row is printed as soon as its last chunk is in, then the whole table sorted by average score.
+def sweep(configs: List[Config], games: int = 1000, seed: int = 0, workers: int = 1, chunk: int = 250,
+          out=sys.stdout) -> Dict[Config, ScoreStats]:
+    base = Config()
+    jobs = [(index, config, seed, start, min(start + chunk, games))
+            for start in range(0, games, chunk) for index, config in enumerate(configs)]
+    pending = [len(range(0, games, chunk))] * len(configs)
+    stats = [ScoreStats() for _ in configs]
+    with multiprocessing.Pool(workers) if workers > 1 else contextlib.nullcontext() as pool:
+        done = pool.imap_unordered(_run_job, jobs) if pool is not None else map(_run_job, jobs)
+        for index, part in done:
+            stats[index].merge(part)
+            pending[index] -= 1
+            if not pending[index]:
+                print(_row(_label(configs[index], base), stats[index]), file=out, flush=True)
+    print(file=out)
+    for index in sorted(range(len(configs)), key=lambda i: -stats[i].mean):
+        print(_row(_label(configs[index], base), stats[index]), file=out)
+    return dict(zip(configs, stats))
+
+
+def _parse_axis(text: str) -> Tuple[str, List[object]]:
+    key, _, values = text.partition('=')
+    return key, [getattr(parse_config([f'{key}={v}']), key) for v in values.split(',')]
+
+
+def main(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(description='Score every combination of strategy settings on the same seeded decks.')
+    parser.add_argument('axes', nargs='+', metavar='KEY=V1,V2,...', help='Config field and the values to try')
+    parser.add_argument('--base', nargs='*', default=[], metavar='KEY=VALUE', help='Config overrides shared by every point')
+    parser.add_argument('--games', type=int, default=1000, help='games per config')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk', type=int, default=250, help='games per job handed to a worker')
+    args = parser.parse_args(argv)
+    sweep(grid(parse_config(args.base), **dict(map(_parse_axis, args.axes))), args.games, args.seed, args.workers, args.chunk)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
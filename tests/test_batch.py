@@ -0,0 +1,21 @@
+import pytest
+
+from hanabai.game import Config
+
+pytest.importorskip('numpy')
+from hanabai import batch
+
+SEED = 7
+CONFIG = Config(max_turns=1000, max_clue_tokens=8)
+
+
+@pytest.mark.parametrize('config', [CONFIG,
+                                    Config(max_turns=1000, max_clue_tokens=8, big_touches=False),
+                                    Config(max_turns=40, max_clue_tokens=8, player_count=3, hand_size=5)])
+def test_batch_matches_game(config):
+    assert batch.check(config, SEED, 200) == []
+
+
+def test_batch_refuses_endgame():
+    with pytest.raises(ValueError):
+        batch.run_games(Config(endgame=True), SEED, 0, 10)
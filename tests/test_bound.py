@@ -0,0 +1,22 @@
+import random
+
+import pytest
+
+from hanabai.game import Config, Deck, Game, Tally, deck_bound, game_seed
+
+SEED = 7
+
+
+@pytest.mark.parametrize('config', [Config(max_turns=1000, max_clue_tokens=8),
+                                    Config(max_turns=1000, max_clue_tokens=8, player_count=2, hand_size=5),
+                                    Config(max_turns=1000, max_clue_tokens=8, player_count=5),
+                                    Config(max_turns=30, max_clue_tokens=8),
+                                    Config(max_turns=45, max_clue_tokens=8, endgame=True)])
+def test_score_never_beats_its_bound(config):
+    for i in range(40):
+        deck = Deck.normal_deck(random.Random(game_seed(SEED, i)))
+        bound = deck_bound(deck, config)
+        g = Game(sim=Tally(), deck=deck, config=config)
+        g.run()
+        assert g.score <= bound <= 25
+
@@ -0,0 +1,107 @@
+import random
+from typing import List, Tuple
+
+import pytest
+
+from hanabai.game import (Action, Config, Deck, Features, Game, OpenEndgame, Player, Result, Rule, Tally,
+                          game_seed)
+
+SEED = 7
+CONFIG = Config(max_turns=1000, max_clue_tokens=8)
+
+
+def _game(i: int) -> Game:
+    return Game(sim=Tally(), deck=Deck.normal_deck(random.Random(game_seed(SEED, i))), config=CONFIG)
+
+
+def _midgame(i: int, turns: int) -> Game:
+    g = _game(i)
+    for _ in range(turns):
+        if not g.step():
+            break
+    return g
+
+
+@pytest.mark.parametrize('i', range(5))
+def test_fork_plays_out_like_the_game(i):
+    g = _midgame(i, 10)
+    fork = g.fork(Tally())
+    fork.run()
+    g.run()
+    assert (fork.score, fork.result, fork.turns) == (g.score, g.result, g.turns)
+
+
+@pytest.mark.parametrize('i', range(5))
+def test_undo_returns_to_push(i):
+    g = _midgame(i, 10)
+    before = g.snapshot()
+    g.push()
+    for _ in range(5):
+        g.step()
+    g.undo()
+    assert g.snapshot() == before
+    untouched = _midgame(i, 10)
+    g.run()
+    untouched.run()
+    assert (g.score, g.result) == (untouched.score, untouched.result)
+
+
+
+# Records the search the way OpenEndgameSearch builds it, from inside the turn, with the game's turn count, last
+# player and score at that point, then lets the rules decide.
+class Peek(Rule):
+    def __init__(self):
+        self.seen: List[Tuple[int, int | None, int, OpenEndgame]] = []
+
+    def __call__(self, player: Player, features: Features) -> Action | None:
+        game = player.game
+        if not game.deck.left:
+            self.seen.append((game.turns, game.last_player, game.score, OpenEndgame(game, player.id)))
+        return None
+
+
+def _peeked(i: int) -> Tuple[Game, List[Tuple[int, int | None, int, OpenEndgame]]]:
+    g = _game(i)
+    peek = Peek()
+    for p in g.players:
+        p.rules = [peek] + p.rules
+    g.run()
+    return g, peek.seen
+
+
+@pytest.mark.parametrize('i', range(10))
+def test_open_endgame_counts_the_final_round(i):
+    g, seen = _peeked(i)
+    for turns, last_player, _, search in seen:
+        assert search.turns == CONFIG.max_turns - turns
+        if last_player is None:
+            # the final round starts with the next play or discard, not with a clue
+            assert search.final is None
+        elif g.result is Result.BOTTOM_OUT:
+            # the turns the search counted on are the turns the game gave
+            assert g.turns - turns == search.final
+
+
+@pytest.mark.parametrize('i', range(10))
+def test_open_endgame_bounds_the_rules(i):
+    g, seen = _peeked(i)
+    for _, _, score, search in seen:
+        assert g.score <= score + search.best(search.stacks, search.hands, 0, search.turns, search.final, search.tokens,
+                                              search.strikes)
+
+
+@pytest.mark.parametrize('i', range(5))
+def test_endgame_games_finish(i):
+    config = Config(max_turns=1000, max_clue_tokens=8, endgame=True)
+    g = Game(sim=Tally(), deck=Deck.normal_deck(random.Random(game_seed(SEED, i))), config=config)
+    g.run()
+    assert g.result is not None and 0 <= g.score <= 25
+
+
+
+def test_rule_needs_a_call():
+    class Unfinished(Rule):
+        name = 'unfinished'
+
+    with pytest.raises(TypeError):
+        Unfinished()
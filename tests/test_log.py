@@ -0,0 +1,33 @@
+import io
+import random
+from typing import List, Tuple
+
+import pytest
+
+from hanabai.game import Game, Deck, Tally, Config, GameLog, read_log, replay, game_seed
+
+SEED = 7
+CONFIG = Config(max_turns=1000, max_clue_tokens=8)
+
+
+def _logged(i: int) -> Tuple[Game, List[list]]:
+    out = io.StringIO()
+    g = Game(sim=Tally(), deck=Deck.normal_deck(random.Random(game_seed(SEED, i))), config=CONFIG, log=GameLog(out))
+    g.run()
+    [events] = read_log(out.getvalue().splitlines())
+    return g, events
+
+
+@pytest.mark.parametrize('i', range(5))
+def test_replay_reproduces_the_score(i):
+    g, events = _logged(i)
+    replayed = replay(events)
+    assert (replayed.score, replayed.result, replayed.turns) == (g.score, g.result, g.turns)
+
+
+def test_replay_stops_at_a_turn():
+    _, events = _logged(0)
+    g = Game(sim=Tally(), deck=Deck.normal_deck(random.Random(game_seed(SEED, 0))), config=CONFIG)
+    for _ in range(12):
+        g.step()
+    assert replay(events, 12).snapshot() == g.snapshot()
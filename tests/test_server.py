@@ -0,0 +1,67 @@
+import json
+import asyncio
+
+from hanabai.server import Server
+
+CONFIG = {'max_turns': 1000, 'max_clue_tokens': 8}
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict):
+    writer.write(json.dumps(message).encode() + b'\n')
+    await writer.drain()
+
+
+async def _read(reader: asyncio.StreamReader) -> dict:
+    return json.loads(await asyncio.wait_for(reader.readline(), 10))
+
+
+async def _serve(test):
+    srv = Server(2)
+    server = await asyncio.start_server(srv.handle, '127.0.0.1', 0, limit=2**20)
+    port = server.sockets[0].getsockname()[1]
+    writers = []
+
+    async def connect():
+        reader, writer = await asyncio.open_connection('127.0.0.1', port, limit=2**20)
+        writers.append(writer)
+        return reader, writer
+
+    async with server:
+        try:
+            await test(srv, connect)
+        finally:  # the server waits for its connections when it closes
+            for writer in writers:
+                writer.close()
+
+
+def test_out_of_turn_moves_are_refused():
+    async def test(srv, connect):
+        (r0, w0), (r1, w1) = await connect(), await connect()
+        join = {'op': 'join', 'table': 't', 'players': 2, 'humans': 2, 'seed': 1, 'config': CONFIG}
+        await _send(w0, join)
+        await _send(w1, join)
+        assert (await _read(r0))['seat'] == 0 and (await _read(r1))['seat'] == 1
+        assert (await _read(r0))['your_turn'] and not (await _read(r1))['your_turn']
+        await _send(w1, {'op': 'play', 'idx': 0})
+        assert await _read(r1) == {'type': 'error', 'message': 'it is not your turn'}
+        await _send(w0, {'op': 'clue', 'to': 1, 'rank': 0})
+        assert (await _read(r0))['type'] == 'error'
+        await _send(w0, {'op': 'play', 'idx': 0})
+        assert not (await _read(r0))['your_turn']
+        assert (await _read(r1))['your_turn']
+    asyncio.run(_serve(test))
+
+
+def test_tables_nobody_is_waiting_at_are_dropped():
+    async def test(srv, connect):
+        r, w = await connect()
+        await _send(w, {'op': 'join', 'table': 't', 'players': 3, 'humans': 2, 'seed': 1, 'config': CONFIG})
+        await _read(r)
+        assert list(srv.tables) == ['t']
+        w.close()
+        for _ in range(100):
+            if not srv.tables:
+                break
+            await asyncio.sleep(0.01)
+        assert srv.tables == {}
+    asyncio.run(_serve(test))
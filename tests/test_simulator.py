@@ -0,0 +1,46 @@
+import pytest
+
+from hanabai.game import Config, Simulator
+
+SEED = 7
+CONFIG = Config(max_turns=1000, max_clue_tokens=8)
+
+
+def test_parallel_matches_serial():
+    serial = Simulator(60, seed=SEED, config=CONFIG, verbose=False)
+    parallel = Simulator(60, workers=3, seed=SEED, config=CONFIG, verbose=False)
+    assert parallel.to_dict() == serial.to_dict()
+
+
+def _read(path) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_resume_matches_an_uninterrupted_run(tmp_path, workers):
+    whole = Simulator(40, workers=workers, seed=SEED, config=CONFIG, verbose=False, log=str(tmp_path / 'whole.log'))
+    checkpoint, log = str(tmp_path / 'run.json'), str(tmp_path / 'run.log')
+    Simulator(20, workers=workers, seed=SEED, config=CONFIG, verbose=False, log=log, checkpoint=checkpoint,
+              checkpoint_every=10)
+    saved = _read(checkpoint)
+    # stopped after logging 5 more games but before checkpointing them
+    Simulator(25, workers=workers, seed=SEED, config=CONFIG, verbose=False, log=log, checkpoint=checkpoint,
+              checkpoint_every=10, resume=True)
+    with open(checkpoint, 'w') as f:
+        f.write(saved)
+    resumed = Simulator(40, workers=workers, seed=SEED, config=CONFIG, verbose=False, log=log, checkpoint=checkpoint,
+                        checkpoint_every=10, resume=True)
+    assert resumed.resumed == 20
+    assert resumed.to_dict() == whole.to_dict()
+    assert _read(log) == _read(tmp_path / 'whole.log')
+
+
+def test_resume_needs_the_same_log_settings(tmp_path):
+    checkpoint = str(tmp_path / 'run.json')
+    Simulator(10, seed=SEED, config=CONFIG, verbose=False, log=str(tmp_path / 'run.log'), checkpoint=checkpoint)
+    with pytest.raises(ValueError):
+        Simulator(20, seed=SEED, config=CONFIG, verbose=False, checkpoint=checkpoint, resume=True)
+    with pytest.raises(ValueError):
+        Simulator(20, seed=SEED + 1, config=CONFIG, verbose=False, log=str(tmp_path / 'run.log'), checkpoint=checkpoint,
+                  resume=True)
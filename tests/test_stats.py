@@ -0,0 +1,41 @@
+import math
+import random
+import statistics
+
+from hanabai.game import ScoreStats, Result, MAX_SCORE
+
+GAMES = [(random.Random(i).randint(0, MAX_SCORE), random.Random(-i).choice(list(Result))) for i in range(1000)]
+
+
+def _stats(games) -> ScoreStats:
+    stats = ScoreStats()
+    for score, result in games:
+        stats.add(score, result)
+    return stats
+
+
+def test_merge_matches_one_pass():
+    merged = _stats(GAMES[:300])
+    merged.merge(_stats(GAMES[300:]))
+    assert merged.to_dict() == _stats(GAMES).to_dict()
+    assert (merged.count, merged.total, merged.squares) == (len(GAMES), sum(s for s, _ in GAMES),
+                                                            sum(s * s for s, _ in GAMES))
+
+
+def test_moments_and_percentiles():
+    stats = _stats(GAMES)
+    scores = sorted(s for s, _ in GAMES)
+    assert stats.mean == statistics.mean(scores)
+    assert math.isclose(stats.variance, statistics.variance(scores))
+    assert stats.max == scores[-1]
+    for p in (1, 10, 25, 50, 75, 90, 100):
+        assert stats.percentile(p) == scores[math.ceil(p * len(scores) / 100) - 1]
+    victories = sorted(s for s, r in GAMES if r == Result.VICTORY)
+    assert stats.percentile(50, Result.VICTORY) == victories[math.ceil(len(victories) / 2) - 1]
+
+
+def test_round_trips_through_dict():
+    stats = _stats(GAMES)
+    stats.bound = 12345
+    back = ScoreStats.from_dict(stats.to_dict())
+    assert (back.count, back.total, back.squares, back.bound) == (stats.count, stats.total, stats.squares, stats.bound)
@@ -0,0 +1,20 @@
+from hanabai.game import Config, Simulator
+from hanabai.store import ResultStore
+
+SEED = 5
+CONFIG = Config(max_turns=1000, max_clue_tokens=8)
+
+
+def test_only_missing_games_are_played(tmp_path):
+    store = ResultStore(str(tmp_path / 'results.db'))
+    first = Simulator(20, seed=SEED, config=CONFIG, store=store, verbose=False)
+    assert first.played == 20
+    assert store.missing(CONFIG, SEED, 30) == list(range(20, 30))
+    second = Simulator(30, seed=SEED, config=CONFIG, store=store, verbose=False)
+    assert second.played == 10
+    assert store.missing(CONFIG, SEED, 30) == []
+    whole = Simulator(30, seed=SEED, config=CONFIG, verbose=False)
+    assert second.to_dict() | {'played_games': 30} == whole.to_dict()
+    assert store.missing(Config(max_turns=1000), SEED, 5) == list(range(5))
+    assert ResultStore(str(tmp_path / 'results.db'), version='other').missing(CONFIG, SEED, 5) == list(range(5))
+    store.close()
@@ -0,0 +1,29 @@
+import io
+
+import pytest
+
+from hanabai.game import Config, Simulator, parse_config
+from hanabai.sweep import grid, sweep
+
+BASE = Config(max_turns=1000, max_clue_tokens=8)
+
+
+def test_grid_is_every_combination_over_the_base():
+    configs = grid(BASE, big_touches=[True, False], hand_size=[4, 5], player_count=[3])
+    assert len(configs) == 4
+    assert {(c.big_touches, c.hand_size, c.player_count) for c in configs} == {(b, h, 3) for b in (True, False) for h in (4, 5)}
+    assert all(c.max_turns == 1000 and c.max_clue_tokens == 8 for c in configs)
+    assert grid(BASE) == [BASE]
+
+
+def test_parse_config():
+    assert parse_config(['big_touches=False', 'max_turns=1000']) == Config(big_touches=False, max_turns=1000)
+    with pytest.raises(ValueError):
+        parse_config(['no_such_setting=1'])
+
+
+def test_sweep_scores_like_a_simulator():
+    configs = grid(BASE, big_touches=[True, False])
+    stats = sweep(configs, games=30, seed=3, workers=2, chunk=7, out=io.StringIO())
+    for config in configs:
+        assert stats[config].to_dict() == Simulator(30, seed=3, config=config, verbose=False).stats.to_dict()